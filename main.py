@@ -9,6 +9,11 @@ from src.auth import AuthManager
 from src.downloader import NovelDownloader
 from src.utils import ChapterModifier, ExtractScriptGenerator
 from src.progress import ProgressManager
+from src.cache import ChapterCache
+from src.sync import NovelSyncer
+from src.batch import BatchDownloader, parse_batch_file
+from src.watch import NovelWatcher, WatchStatus
+from src.repair import ChapterRepairer
 from src.logger import setup_logger
 from src.config import Config, setup_directories
 
@@ -24,7 +29,7 @@ def setup_command(args):
 def login_command(args):
     """登录并获取Cookie"""
     try:
-        auth = AuthManager()
+        auth = AuthManager(login_method=args.method)
         if args.user:
             auth.login(user_id=args.user)
         else:
@@ -36,8 +41,25 @@ def login_command(args):
 def download_command(args):
     """下载小说"""
     logger = setup_logger('downloader')
+    downloader = None
     try:
-        downloader = NovelDownloader(user_id=args.user)
+        if args.batch and args.novel_id:
+            print("❌ 错误: 不能同时指定小说ID和 --batch 参数")
+            return
+
+        downloader = NovelDownloader(
+            user_id=args.user, workers=args.workers, engine=args.engine,
+            use_pool=args.pool or None, use_cache=False if args.no_cache else None,
+            hedge=args.hedge or None, http2=args.http2 or None, parse_processes=args.parse_processes,
+            archive_mode='record' if args.record else 'replay' if args.replay else None,
+            archive_file=Path(args.record or args.replay) if (args.record or args.replay) else None
+        )
+
+        # 批量下载
+        if args.batch:
+            if not batch_download(downloader, args):
+                sys.exit(1)
+            return
 
         # 交互式使用
         if not args.novel_id:
@@ -61,7 +83,8 @@ def download_command(args):
         downloader.download_novel(
             novel_id=args.novel_id,
             start_chapter=args.start,
-            end_chapter=end_chapter
+            end_chapter=end_chapter,
+            refresh=args.refresh
         )
     except KeyboardInterrupt:
         print("\n👋 下载已取消")
@@ -69,9 +92,123 @@ def download_command(args):
     except Exception as e:
         logger.exception(f"下载过程中发生错误: {str(e)}")
         print(f"❌ 下载失败: {str(e)}")
+    finally:
+        if downloader:
+            downloader.close()
+
+def batch_download(downloader, args):
+    """按列表批量下载小说，全部成功（或跳过）时返回 True"""
+    try:
+        entries = parse_batch_file(args.batch)
+    except (OSError, ValueError) as e:
+        print(f"❌ 读取批量下载列表失败: {str(e)}")
+        return False
+
+    if not entries:
+        print("📭 批量下载列表为空")
+        return True
+
+    results = BatchDownloader(downloader, jobs=args.jobs).run(entries, resume=args.resume)
+    return all(status in ('done', 'skipped') for status, _ in results.values())
+
+def sync_command(args):
+    """增量同步连载小说的新章节"""
+    logger = setup_logger('sync')
+    downloader = None
+    try:
+        downloader = NovelDownloader(
+            user_id=args.user, workers=args.workers, engine=args.engine, use_pool=args.pool or None,
+            hedge=args.hedge or None, http2=args.http2 or None
+        )
+        syncer = NovelSyncer(downloader)
+        for novel_id in args.novel_ids:
+            try:
+                syncer.sync(novel_id)
+            except Exception as e:
+                logger.exception(f"同步小说 {novel_id} 失败: {str(e)}")
+                print(f"❌ 同步小说 {novel_id} 失败: {str(e)}")
+    except KeyboardInterrupt:
+        print("\n👋 同步已取消")
+        sys.exit(0)
+    finally:
+        if downloader:
+            downloader.close()
+
+def watch_command(args):
+    """定时轮询关注的小说并下载新章节"""
+    if args.status:
+        WatchStatus().view()
+        return
+
+    watch_file = Path(args.list) if args.list else Config.WATCH_FILE
+    if not args.novel_ids and not watch_file.exists():
+        print(f"❌ 关注列表不存在: {watch_file}，请先运行 setup 或通过 --list 指定")
+        return
+
+    downloader = None
+    try:
+        downloader = NovelDownloader(
+            user_id=args.user, workers=args.workers, engine=args.engine, use_pool=args.pool or None,
+            hedge=args.hedge or None, http2=args.http2 or None
+        )
+        watcher = NovelWatcher(
+            downloader, watch_file=watch_file, interval=args.interval * 60 if args.interval else None
+        )
+        watcher.run(args.novel_ids)
+    except ValueError as e:
+        print(f"❌ 读取关注列表失败: {str(e)}")
+    except KeyboardInterrupt:
+        print("\n👋 轮询已停止")
+        sys.exit(0)
+    finally:
+        if downloader:
+            downloader.close()
+
+def repair_command(args):
+    """重新下载失败的章节并替换文件中的占位文本"""
+    if args.list:
+        progress_mgr = ProgressManager()
+        try:
+            progress_mgr.view_holes(args.novel_ids[0] if len(args.novel_ids) == 1 else None)
+        finally:
+            progress_mgr.close()
+        return
+
+    logger = setup_logger('repair')
+    kinds = ('failed', 'missing') if args.missing else ('failed',)
+    downloader = None
+    try:
+        downloader = NovelDownloader(
+            user_id=args.user, workers=args.workers, engine=args.engine, use_pool=args.pool or None,
+            hedge=args.hedge or None, http2=args.http2 or None
+        )
+        novel_ids = args.novel_ids or list(dict.fromkeys(
+            hole['novel_id'] for hole in downloader.progress_mgr.get_holes(kinds=kinds)
+        ))
+        if not novel_ids:
+            print("✅ 没有待修复的章节")
+            return
+
+        repairer = ChapterRepairer(downloader)
+        for novel_id in novel_ids:
+            try:
+                repairer.repair(novel_id, kinds)
+            except Exception as e:
+                logger.exception(f"修复小说 {novel_id} 失败: {str(e)}")
+                print(f"❌ 修复小说 {novel_id} 失败: {str(e)}")
+            if repairer.stopped:
+                print("👋 修复已停止")
+                break
+    except KeyboardInterrupt:
+        print("\n👋 修复已取消")
+        sys.exit(0)
+    finally:
+        if downloader:
+            downloader.close()
 
 def progress_command(args):
     """管理下载进度"""
+    progress_mgr = None
     try:
         progress_mgr = ProgressManager()
 
@@ -81,7 +218,7 @@ def progress_command(args):
             return
 
         if args.view:
-            progress_mgr.view_progress()
+            progress_mgr.view_progress(sort_by=args.sort, page=args.page, page_size=args.page_size)
         elif args.resume:
             if not args.novel_id:
                 print("❌ 使用 --resume 时必须指定 --novel-id 参数")
@@ -109,6 +246,27 @@ def progress_command(args):
     except KeyboardInterrupt:
         print("\n👋 进度管理已取消")
         sys.exit(0)
+    finally:
+        if progress_mgr:
+            progress_mgr.close()
+
+def cache_command(args):
+    """管理章节缓存"""
+    try:
+        cache = ChapterCache()
+        try:
+            if args.clear:
+                cache.clear()
+                print("✅ 已清空章节缓存")
+            elif args.prune is not None:
+                removed = cache.prune(args.prune if args.prune >= 0 else None)
+                print(f"✅ 已清理 {removed} 个章节")
+            cache.view_stats()
+        finally:
+            cache.close()
+    except KeyboardInterrupt:
+        print("\n👋 缓存管理已取消")
+        sys.exit(0)
 
 def modify_command(args):
     """修改章节编号"""
@@ -145,20 +303,64 @@ def main():
     parser = argparse.ArgumentParser(description='UAA小说下载器')
     subparsers = parser.add_subparsers(dest='command', help='子命令')
 
+    # download、sync、watch、repair 共用的下载选项
+    fetch_options = argparse.ArgumentParser(add_help=False)
+    fetch_options.add_argument('--user', type=int, help='指定用户ID')
+    fetch_options.add_argument('--workers', type=int, help=f'并发下载数 (默认: sync引擎{Config.DOWNLOAD_WORKERS}，async引擎{Config.ASYNC_CONCURRENCY})')
+    fetch_options.add_argument('--engine', choices=['sync', 'async'], help=f'下载引擎 (默认: {Config.FETCH_ENGINE})')
+    fetch_options.add_argument('--pool', action='store_true', help='使用所有已登录账号轮流下载章节')
+    fetch_options.add_argument('--hedge', action='store_true',
+                               help=f'章节请求超过历史耗时p{Config.HEDGE_QUANTILE * 100:.0f}时再发一个相同请求，先返回的胜出')
+    fetch_options.add_argument('--http2', action='store_true',
+                               help='使用 HTTP/2 多路复用（需要 async 引擎和 h2，未指定 --engine 时自动使用 async）')
+
     # setup命令
     setup_parser = subparsers.add_parser('setup', help='初始化项目目录结构')
 
     # login命令
     login_parser = subparsers.add_parser('login', help='登录并获取Cookie')
     login_parser.add_argument('--user', help='指定用户ID或"all"表示所有用户')
+    login_parser.add_argument('--method', choices=['auto', 'http', 'browser'],
+                              help=f'登录方式：auto 优先用 HTTP 请求登录，页面需要 JS 时改用浏览器 (默认: {Config.LOGIN_METHOD})')
 
     # download命令
-    download_parser = subparsers.add_parser('download', help='下载小说')
+    download_parser = subparsers.add_parser('download', help='下载小说', parents=[fetch_options])
     download_parser.add_argument('novel_id', nargs='?', help='小说ID')
     download_parser.add_argument('--start', type=int, default=1, help='起始章节 (默认: 1)')
     download_parser.add_argument('--end', type=int, help='结束章节')
     download_parser.add_argument('--count', type=int, help='要下载的章节数量')
-    download_parser.add_argument('--user', type=int, help='指定用户ID')
+    download_parser.add_argument('--parse-processes', type=int,
+                                 help=f'用多个子进程解析章节，0 表示在线程中解析 (默认: {Config.PARSE_PROCESSES})')
+    download_parser.add_argument('--no-cache', action='store_true', help='不读写章节缓存，全部从网络获取')
+    download_parser.add_argument('--refresh', action='store_true',
+                                 help=f'忽略目录缓存，重新获取小说目录 (缓存有效期: {Config.CATALOG_CACHE_TTL}秒)')
+    download_parser.add_argument('--batch', metavar='FILE',
+                                 help='批量下载列表文件，每行 "小说ID [起始章节[-结束章节]]"，"-" 表示从标准输入读取')
+    download_parser.add_argument('--jobs', type=int, help=f'批量下载时同时进行的小说数量 (默认: {Config.BATCH_JOBS})')
+    download_parser.add_argument('--resume', action='store_true', help='批量下载时，未指定范围的小说从已保存的进度继续')
+    archive_group = download_parser.add_mutually_exclusive_group()
+    archive_group.add_argument('--record', nargs='?', const=str(Config.HTTP_ARCHIVE_FILE), metavar='FILE',
+                               help=f'把响应记录到存档文件 (默认: {Config.HTTP_ARCHIVE_FILE.name})')
+    archive_group.add_argument('--replay', nargs='?', const=str(Config.HTTP_ARCHIVE_FILE), metavar='FILE',
+                               help='只从存档文件读取响应，离线重新解析（输出到 output/replay/）')
+
+    # sync命令
+    sync_parser = subparsers.add_parser('sync', help='增量同步连载小说的新章节', parents=[fetch_options])
+    sync_parser.add_argument('novel_ids', nargs='+', help='小说ID，可指定多个')
+
+    # watch命令
+    watch_parser = subparsers.add_parser('watch', help='定时轮询关注的小说并下载新章节', parents=[fetch_options])
+    watch_parser.add_argument('novel_ids', nargs='*', help='小说ID，不指定时读取关注列表')
+    watch_parser.add_argument('--list', metavar='FILE', help=f'关注列表文件 (默认: {Config.WATCH_FILE.name})')
+    watch_parser.add_argument('--interval', type=float,
+                              help=f'基础轮询间隔，单位分钟 (默认: {Config.WATCH_INTERVAL // 60})')
+    watch_parser.add_argument('--status', action='store_true', help='查看各小说的下次轮询时间和上次结果')
+
+    # repair命令
+    repair_parser = subparsers.add_parser('repair', help='重新下载失败的章节并替换文件中的占位文本', parents=[fetch_options])
+    repair_parser.add_argument('novel_ids', nargs='*', help='小说ID，不指定时修复队列中的所有小说')
+    repair_parser.add_argument('--missing', action='store_true', help='同时重试未找到正文的章节')
+    repair_parser.add_argument('--list', action='store_true', help='查看待修复章节队列')
 
     # progress命令
     progress_parser = subparsers.add_parser('progress', help='管理下载进度')
@@ -166,6 +368,16 @@ def main():
     progress_parser.add_argument('--resume', action='store_true', help='继续下载')
     progress_parser.add_argument('--clear', action='store_true', help='清除进度')
     progress_parser.add_argument('--novel-id', help='小说ID')
+    progress_parser.add_argument('--sort', choices=list(ProgressManager.SORT_ORDERS), default='updated',
+                                 help='查看进度时的排序方式（默认按最近更新）')
+    progress_parser.add_argument('--page', type=int, help='分页查看进度，指定页码')
+    progress_parser.add_argument('--page-size', type=int, help=f'每页记录数（默认{Config.PROGRESS_PAGE_SIZE}）')
+
+    # cache命令
+    cache_parser = subparsers.add_parser('cache', help='查看和清理章节缓存')
+    cache_parser.add_argument('--prune', type=float, nargs='?', const=-1,
+                              help=f'按最近访问时间清理缓存到指定大小MB (默认: {Config.CHAPTER_CACHE_MAX_MB})')
+    cache_parser.add_argument('--clear', action='store_true', help='清空章节缓存')
 
     # modify命令
     modify_parser = subparsers.add_parser('modify', help='修改章节编号')
@@ -190,7 +402,11 @@ def main():
         'setup': setup_command,
         'login': login_command,
         'download': download_command,
+        'sync': sync_command,
+        'watch': watch_command,
+        'repair': repair_command,
         'progress': progress_command,
+        'cache': cache_command,
         'modify': modify_command,
         'extract': extract_command
     }
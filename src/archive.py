@@ -0,0 +1,95 @@
+import json
+import sqlite3
+import threading
+import time
+import zlib
+import requests
+from requests.structures import CaseInsensitiveDict
+from .config import Config
+from .logger import setup_logger
+
+# 存档保存的是解压后的响应体，回放时这些描述传输编码的响应头不再适用
+_TRANSFER_HEADERS = {'content-encoding', 'content-length', 'transfer-encoding'}
+
+class HttpArchive:
+    """HTTP 响应存档，用于离线重新解析和可重复的性能测试
+
+    record 模式下把成功的响应（URL、状态码、响应头、响应体）写入 SQLite 文件，
+    响应体以 zlib 压缩保存；replay 模式下 get_response 完全从存档返回响应，
+    不发送任何网络请求，存档中没有的 URL 直接报错。同一 URL 只保留最近一次记录。
+    """
+
+    MODES = ('record', 'replay')
+
+    def __init__(self, archive_file=None, mode='record'):
+        """初始化存档，mode 为 record 或 replay"""
+        if mode not in self.MODES:
+            raise ValueError(f"未知的存档模式: {mode}")
+        self.logger = setup_logger('archive')
+        self.archive_file = archive_file or Config.HTTP_ARCHIVE_FILE
+        self.mode = mode
+        self.recorded = 0  # 本次写入的响应数
+        self.replayed = 0  # 本次回放的响应数
+        self._lock = threading.Lock()
+
+        if mode == 'replay' and not self.archive_file.exists():
+            raise FileNotFoundError(f"存档文件不存在: {self.archive_file}")
+        self.archive_file.parent.mkdir(parents=True, exist_ok=True)
+
+        self._conn = sqlite3.connect(str(self.archive_file), check_same_thread=False)
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS responses (
+                url TEXT PRIMARY KEY,
+                status INTEGER NOT NULL,
+                headers TEXT NOT NULL,
+                body BLOB NOT NULL,
+                recorded REAL NOT NULL
+            )
+        ''')
+        self._conn.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM responses').fetchone()[0]
+
+    def record(self, url, status, headers, body):
+        """记录一次响应，304 等没有完整响应体的结果不记录"""
+        if status == 304:
+            return
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO responses (url, status, headers, body, recorded) VALUES (?, ?, ?, ?, ?)',
+                (url, status, json.dumps(dict(headers), ensure_ascii=False), zlib.compress(body), time.time())
+            )
+            self._conn.commit()
+            self.recorded += 1
+        self.logger.debug(f"记录响应: {url} ({len(body)} 字节)")
+
+    def replay(self, url):
+        """从存档构造 requests.Response，存档中没有该 URL 或记录的是错误状态时抛出异常"""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT status, headers, body FROM responses WHERE url = ?', (url,)
+            ).fetchone()
+            if row is not None:
+                self.replayed += 1
+        if row is None:
+            raise Exception(f"存档中没有该请求: {url}")
+
+        status, headers, body = row
+        resp = requests.Response()
+        resp.url = url
+        resp.status_code = status
+        resp.headers = CaseInsensitiveDict(
+            {name: value for name, value in json.loads(headers).items() if name.lower() not in _TRANSFER_HEADERS}
+        )
+        resp._content = zlib.decompress(body)
+        resp.encoding = requests.utils.get_encoding_from_headers(resp.headers)
+        resp.raise_for_status()
+        self.logger.debug(f"回放响应: {url}")
+        return resp
+
+    def close(self):
+        """关闭数据库连接"""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,190 @@
+import asyncio
+import threading
+import time
+import httpx
+from .config import Config
+from .logger import setup_logger
+from .retry import RetryPolicy
+from .singleflight import AsyncSingleFlight, request_key
+
+try:
+    import h2  # noqa: F401  httpx 的 HTTP/2 支持依赖 h2
+except ImportError:  # 未安装时只能使用 HTTP/1.1
+    h2 = None
+
+class AsyncFetchEngine:
+    """基于 asyncio + httpx 的异步抓取引擎
+
+    事件循环运行在独立的后台线程中，调用方通过 submit() 提交协程，
+    拿到 concurrent.futures.Future，因此可以和线程池路径共用同一套
+    有序写入逻辑；单个线程即可维持大量在途请求。账号调度和限速复用
+    同步路径的 SessionPool，每个账号对应一个 AsyncClient。启用 HTTP/2 时
+    同一主机的请求复用一条连接多路并发。
+    """
+
+    def __init__(self, pool, concurrency=None, retry_policy=None, http2=None):
+        """初始化异步引擎，请求头与 SessionPool 中各账号的 Session 保持一致
+
+        http2 默认取 Config.HTTP2，需要安装 h2（pip install httpx[http2]）
+        """
+        self.logger = setup_logger('async_engine')
+        self.pool = pool
+        self.concurrency = concurrency or Config.ASYNC_CONCURRENCY
+        self.http2 = Config.HTTP2 if http2 is None else http2
+        if self.http2 and h2 is None:
+            self.logger.warning("未安装 h2，无法启用 HTTP/2，改用 HTTP/1.1")
+            print("⚠️ 未安装 h2（pip install httpx[http2]），改用 HTTP/1.1")
+            self.http2 = False
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.hedges_issued = 0  # 发出的对冲请求数
+        self.hedges_won = 0  # 对冲请求先于原请求完成的次数
+        self.flight = AsyncSingleFlight()
+        self._clients = {}
+
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._loop.run_forever, name='async-engine', daemon=True
+        )
+        self._thread.start()
+
+        self._semaphore = None
+        self.submit(self._setup()).result()
+
+    async def _setup(self):
+        """在事件循环线程中创建并发信号量"""
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+
+    def _client(self, member):
+        """获取账号对应的 AsyncClient，Cookie 更新后会创建新的客户端"""
+        key = (member.user_id, member.cookie)
+        client = self._clients.get(key)
+        if client is None:
+            client = self._clients[key] = httpx.AsyncClient(
+                headers=member.headers,
+                follow_redirects=True,
+                http2=self.http2,
+                timeout=httpx.Timeout(Config.READ_TIMEOUT, connect=Config.CONNECT_TIMEOUT),
+                limits=httpx.Limits(
+                    max_connections=self.concurrency,
+                    max_keepalive_connections=self.concurrency,
+                    keepalive_expiry=Config.HTTP_KEEPALIVE_EXPIRY
+                )
+            )
+        return client
+
+    def submit(self, coro):
+        """将协程提交到后台事件循环，返回 concurrent.futures.Future"""
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    async def _request(self, url, headers=None, reserved=None):
+        """通过会话池发送一次请求（不含重试），拿到限速令牌、即将发出请求时设置 reserved"""
+        async with self._semaphore:
+            # 所有账号都在冷却时 acquire 会阻塞，放到线程池中等待
+            member, wait = await self._loop.run_in_executor(None, self.pool.acquire, url)
+            if wait:
+                await asyncio.sleep(wait)
+            if reserved is not None:
+                reserved.set()
+            started = time.monotonic()
+            try:
+                resp = await self._client(member).get(url, headers=headers)
+            except httpx.TransportError:
+                self.pool.report(member, url)
+                raise
+        self.pool.report(member, url, resp.status_code, time.monotonic() - started)
+        self.pool.record_traffic(url, resp.num_bytes_downloaded, len(resp.content))
+        return resp
+
+    async def _hedged_request(self, url, headers=None):
+        """发送请求，发出后超过该主机历史耗时的 HEDGE_QUANTILE 分位仍未完成时再发一个，先成功的胜出"""
+        delay = self.pool.latency.hedge_delay(url)
+        if delay is None:
+            return await self._request(url, headers)
+
+        reserved = asyncio.Event()
+        primary = asyncio.ensure_future(self._request(url, headers, reserved))
+        # 对冲计时从请求真正发出时开始，排队等待并发名额和限速令牌的时间不计入
+        waiter = asyncio.ensure_future(reserved.wait())
+        try:
+            await asyncio.wait({primary, waiter}, return_when=asyncio.FIRST_COMPLETED)
+            done, _ = await asyncio.wait({primary}, timeout=delay)
+        except asyncio.CancelledError:
+            primary.cancel()
+            raise
+        finally:
+            waiter.cancel()
+        if done:
+            return primary.result()
+
+        self.logger.info(f"请求超过 {delay:.2f} 秒未完成，发送对冲请求: {url}")
+        hedge = asyncio.ensure_future(self._request(url, headers))
+        self.hedges_issued += 1
+
+        pending = {primary, hedge}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None and task.result().status_code < 500:
+                        if task is hedge:
+                            self.hedges_won += 1
+                        return task.result()
+        finally:
+            for task in pending:
+                task.cancel()
+        # 两个请求都失败时以原请求的结果为准，交给外层重试
+        return primary.result()
+
+    async def fetch(self, url, retry=Config.RETRY_COUNT, headers=None, hedge=False):
+        """异步获取网页响应，带重试功能；hedge 为真时对慢请求发送对冲请求
+
+        同一URL和请求头的并发请求合并为一次，结果共享给所有调用方
+        """
+        return await self.flight.do(request_key(url, headers), self._fetch, url, retry, headers, hedge)
+
+    async def _fetch(self, url, retry, headers, hedge):
+        """fetch 的实际实现"""
+        for attempt in range(retry + 1):
+            try:
+                if hedge:
+                    resp = await self._hedged_request(url, headers)
+                else:
+                    resp = await self._request(url, headers)
+                # 条件请求的 304 与同步引擎一致，交给调用方判断内容未变化
+                if resp.status_code == 304 and headers:
+                    return resp
+                resp.raise_for_status()
+                return resp
+            except httpx.HTTPError as e:
+                self.logger.warning(f"第{attempt+1}次请求失败: {url}, 错误: {str(e)}")
+                resp = e.response if isinstance(e, httpx.HTTPStatusError) else None
+                if resp is None and not isinstance(e, httpx.TransportError):
+                    raise Exception(f"网络请求失败: {str(e)}")
+                if not self.retry_policy.should_retry(
+                    resp.status_code if resp is not None else None, self.pool.account_count()
+                ):
+                    self.logger.error(f"请求失败，错误不可重试: {url}")
+                    raise Exception(f"网络请求失败: {str(e)}")
+                if attempt < retry:
+                    wait_time = self.retry_policy.delay(
+                        attempt, resp.headers.get('Retry-After') if resp is not None else None
+                    )
+                    self.logger.info(f"等待{wait_time:.1f}秒后重试...")
+                    await asyncio.sleep(wait_time)
+                else:
+                    self.logger.error(f"请求失败，已达到最大重试次数: {url}")
+                    raise Exception(f"网络请求失败，已重试{retry}次: {str(e)}")
+
+    def get(self, url, retry=Config.RETRY_COUNT, headers=None, hedge=False):
+        """同步等待异步请求完成，供目录页等单次请求使用"""
+        return self.submit(self.fetch(url, retry, headers, hedge)).result()
+
+    def close(self):
+        """关闭客户端并停止事件循环"""
+        if not self._loop.is_running():
+            return
+        for client in self._clients.values():
+            self.submit(client.aclose()).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
@@ -1,16 +1,15 @@
 import json
 import re
 import sys
-import time
 import os
 import shutil
+import subprocess
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
 from pathlib import Path
 from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.chrome.service import Service
 from selenium.common.exceptions import WebDriverException, TimeoutException
@@ -18,14 +17,30 @@ from webdriver_manager.chrome import ChromeDriverManager
 from .config import Config
 from .logger import setup_logger
 from .captcha_solver import CaptchaSolver
+from .cookie_store import CookieStore
+from .browser_pool import BrowserPool
+from .http_login import HttpLogin, LoginRequiresBrowser
+from .browser_login import BrowserLogin
 
 class AuthManager:
     """身份验证管理类"""
 
-    def __init__(self):
-        """初始化身份验证管理器"""
+    def __init__(self, login_method=None):
+        """初始化身份验证管理器
+
+        login_method 为 'auto'（优先 HTTP 登录，页面需要 JS 时改用浏览器）、
+        'http' 或 'browser'，默认取 Config.LOGIN_METHOD
+        """
         self.logger = setup_logger('auth')
+        self.login_method = login_method or Config.LOGIN_METHOD
+        if self.login_method not in ('auto', 'http', 'browser'):
+            raise ValueError(f"未知的登录方式: {self.login_method}")
+        # HTTP 登录已确认需要浏览器时，后续账号不再尝试
+        self._http_unsupported = False
+        self._chromedriver_path = None
+        self._driver_lock = threading.Lock()
         self.cookie_file = Config.COOKIE_FILE
+        self.cookie_store = CookieStore(self.cookie_file)
         self.users_file = Config.USERS_FILE
         self.captcha_solver = CaptchaSolver()
 
@@ -61,15 +76,87 @@ class AuthManager:
             self.logger.exception(f"读取用户文件时出错: {str(e)}")
             return []
 
+    def _detect_chrome_version(self):
+        """在本地读取已安装的 Chrome 版本号（不访问网络），读取失败返回 None"""
+        if sys.platform == 'win32':
+            try:
+                import winreg
+            except ImportError:
+                return None
+            for root in (winreg.HKEY_CURRENT_USER, winreg.HKEY_LOCAL_MACHINE):
+                try:
+                    with winreg.OpenKey(root, r'Software\Google\Chrome\BLBeacon') as key:
+                        return winreg.QueryValueEx(key, 'version')[0]
+                except OSError:
+                    continue
+            return None
+
+        candidates = [
+            '/Applications/Google Chrome.app/Contents/MacOS/Google Chrome',
+            'google-chrome', 'google-chrome-stable', 'chromium', 'chromium-browser'
+        ]
+        for candidate in candidates:
+            executable = candidate if os.path.isabs(candidate) else shutil.which(candidate)
+            if not executable or not os.path.exists(executable):
+                continue
+            try:
+                output = subprocess.run(
+                    [executable, '--version'], capture_output=True, text=True, timeout=10
+                ).stdout
+            except (OSError, subprocess.SubprocessError):
+                continue
+            match = re.search(r'\d+(?:\.\d+){1,3}', output)
+            if match:
+                return match.group(0)
+        return None
+
+    def _load_driver_cache(self):
+        """读取上次解析的 ChromeDriver 记录 {'path', 'chrome_version', 'resolved'}，不可用返回 None"""
+        try:
+            with open(Config.CHROMEDRIVER_CACHE_FILE, 'r', encoding='utf-8') as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not isinstance(cached, dict) or not cached.get('path') or not os.path.exists(cached['path']):
+            return None
+        return cached
+
+    def _save_driver_cache(self, path, chrome_version):
+        """记录解析出的 ChromeDriver 路径和对应的 Chrome 版本"""
+        cache_file = Config.CHROMEDRIVER_CACHE_FILE
+        temp_path = cache_file.with_name(cache_file.name + '.tmp')
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'path': str(path),
+                'chrome_version': chrome_version,
+                'resolved': datetime.now().timestamp()
+            }, f, ensure_ascii=False, indent=2)
+        os.replace(temp_path, cache_file)
+
     def _get_chromedriver_path(self):
-        """获取ChromeDriver路径，自动下载和管理"""
+        """获取ChromeDriver路径，优先使用本地记录，Chrome 主版本变化时才重新解析
+
+        本地记录可用且 Chrome 主版本未变（或无法读取本地版本）时直接返回，不访问网络；
+        重新解析失败时仍有旧的 ChromeDriver 可用则继续使用，否则抛出异常
+        """
+        # 确保目录存在
+        Config.WEBDRIVER_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+
+        chrome_version = self._detect_chrome_version()
+        cached = self._load_driver_cache()
+        if cached:
+            cached_version = cached.get('chrome_version')
+            if chrome_version is None or (
+                cached_version and cached_version.split('.')[0] == chrome_version.split('.')[0]
+            ):
+                self.logger.info(f"使用已缓存的ChromeDriver: {cached['path']} (Chrome {cached_version or '未知版本'})")
+                return cached['path']
+            self.logger.info(f"Chrome版本已从 {cached_version} 变为 {chrome_version}，重新获取ChromeDriver")
+
         self.logger.info("开始获取ChromeDriver...")
         print("🔄 正在检查/下载ChromeDriver...")
 
         try:
-            # 确保目录存在
-            Config.WEBDRIVER_CACHE_DIR.mkdir(parents=True, exist_ok=True)
-
             # 使用webdriver_manager自动管理ChromeDriver
             self.logger.info("使用webdriver_manager自动管理ChromeDriver")
 
@@ -82,19 +169,26 @@ class AuthManager:
             self.logger.info(f"ChromeDriver下载成功: {chromedriver_path}")
             print(f"✅ ChromeDriver下载成功: {chromedriver_path}")
 
+            self._save_driver_cache(chromedriver_path, chrome_version)
             return chromedriver_path
 
         except Exception as e:
             self.logger.warning(f"webdriver_manager失败: {str(e)}")
             print(f"⚠️ 自动下载ChromeDriver失败: {str(e)}")
 
+            if cached:
+                # 版本可能不完全匹配，但比无法登录要好
+                self.logger.warning(f"继续使用已缓存的ChromeDriver: {cached['path']}")
+                print(f"⚠️ 继续使用已缓存的ChromeDriver: {cached['path']}")
+                return cached['path']
+
             # 下载失败
             self.logger.error("无法获取ChromeDriver")
             print("❌ 错误: 无法获取ChromeDriver，请尝试以下解决方案：")
             print("  1. 检查网络连接")
             print("  2. 确保Chrome浏览器已正确安装")
             print("  3. 检查防火墙设置")
-            sys.exit(1)
+            raise Exception("无法获取ChromeDriver")
 
     def login(self, user_id=None):
         """登录并获取Cookie"""
@@ -107,51 +201,7 @@ class AuthManager:
 
             # 处理 "all" 参数，为所有用户登录
             if user_id == "all":
-                self.logger.info("开始为所有用户登录")
-                print(f"\n🔑 开始为所有 {len(users)} 个账号登录...")
-
-                success_count = 0
-                failed_users = []
-
-                for i, user in enumerate(users, 1):
-                    print(f"\n{'='*50}")
-                    print(f"正在处理第 {i}/{len(users)} 个账号: {user['email']}")
-                    print(f"{'='*50}")
-
-                    # 检查该用户的Cookie是否已存在且有效
-                    existing_cookie = self.get_cookie(user['num'])
-                    if existing_cookie:
-                        print(f"✅ 账号 {user['email']} 的Cookie仍然有效，跳过登录")
-                        self.logger.info(f"用户 {user['num']} 的Cookie有效，跳过登录")
-                        success_count += 1
-                        continue
-
-                    try:
-                        self._selenium_login(user)
-                        success_count += 1
-                        print(f"✅ 账号 {user['email']} 登录成功")
-                    except KeyboardInterrupt:
-                        print(f"\n👋 登录已取消，程序退出")
-                        sys.exit(0)
-                    except Exception as e:
-                        self.logger.error(f"账号 {user['email']} 登录失败: {str(e)}")
-                        print(f"❌ 账号 {user['email']} 登录失败: {str(e)}")
-                        failed_users.append(user['num'])
-
-                    # 在账号之间添加短暂延迟
-                    if i < len(users):
-                        print("⏳ 等待 3 秒后继续下一个账号...")
-                        time.sleep(3)
-
-                # 显示总结
-                print(f"\n{'='*50}")
-                print(f"📊 登录完成统计:")
-                print(f"  ✅ 成功/跳过: {success_count}/{len(users)}")
-                print(f"  ❌ 失败: {len(failed_users)}/{len(users)}")
-                if failed_users:
-                    print(f"  ❌ 失败账号: {', '.join(map(str, failed_users))}")
-                print(f"{'='*50}")
-
+                self._login_all(users)
                 return
 
             # 选择用户
@@ -203,51 +253,80 @@ class AuthManager:
                 return
 
             # 登录获取Cookie
-            self._selenium_login(selected_user)
+            self._login_user(selected_user)
 
         except KeyboardInterrupt:
             print("\n👋 登录管理器已退出")
             sys.exit(0)
 
+    def _login_all(self, users):
+        """为所有Cookie失效的账号登录
+
+        最多 Config.LOGIN_PARALLELISM 个账号同时登录；需要浏览器时使用浏览器池复用常驻的 Chrome
+        """
+        self.logger.info("开始为所有用户登录")
+        print(f"\n🔑 开始为所有 {len(users)} 个账号登录...")
+
+        pending = []
+        for user in users:
+            # 检查该用户的Cookie是否已存在且有效
+            if self.get_cookie(user['num']):
+                print(f"✅ 账号 {user['email']} 的Cookie仍然有效，跳过登录")
+                self.logger.info(f"用户 {user['num']} 的Cookie有效，跳过登录")
+            else:
+                pending.append(user)
+
+        failed_users = []
+        if pending:
+            parallelism = min(max(1, Config.LOGIN_PARALLELISM), len(pending))
+            print(f"🌐 {len(pending)} 个账号需要登录，同时登录 {parallelism} 个")
+            # 浏览器只在 HTTP 登录不可用时才会启动
+            pool = BrowserPool(self._create_driver, self._reset_driver, parallelism)
+            executor = ThreadPoolExecutor(max_workers=parallelism, thread_name_prefix='login')
+
+            def login_user(user):
+                if self._try_http_login(user):
+                    return
+                with pool.acquire() as driver:
+                    self._login_with_driver(driver, user)
+
+            try:
+                futures = {executor.submit(login_user, user): user for user in pending}
+                for done, future in enumerate(as_completed(futures), 1):
+                    user = futures[future]
+                    try:
+                        future.result()
+                        print(f"✅ [{done}/{len(pending)}] 账号 {user['email']} 登录成功")
+                    except Exception as e:
+                        self.logger.error(f"账号 {user['email']} 登录失败: {str(e)}")
+                        print(f"❌ [{done}/{len(pending)}] 账号 {user['email']} 登录失败: {str(e)}")
+                        failed_users.append(user['num'])
+            except KeyboardInterrupt:
+                print(f"\n👋 登录已取消，程序退出")
+                sys.exit(0)
+            finally:
+                # 中断或出现意外错误时同样关闭常驻的浏览器
+                executor.shutdown(wait=False, cancel_futures=True)
+                pool.close()
+
+        # 显示总结
+        print(f"\n{'='*50}")
+        print(f"📊 登录完成统计:")
+        print(f"  ✅ 成功/跳过: {len(users) - len(failed_users)}/{len(users)}")
+        print(f"  ❌ 失败: {len(failed_users)}/{len(users)}")
+        if failed_users:
+            print(f"  ❌ 失败账号: {', '.join(map(str, sorted(failed_users)))}")
+        print(f"{'='*50}")
+
     def _save_user_cookie(self, user, cookie_data):
         """保存用户Cookie，支持多用户管理"""
         try:
-            # 读取现有的cookies文件
-            existing_cookies = []
-            if self.cookie_file.exists():
-                try:
-                    with open(self.cookie_file, 'r', encoding='utf-8') as f:
-                        content = json.load(f)
-                        if isinstance(content, list):
-                            existing_cookies = content
-                except json.JSONDecodeError:
-                    self.logger.warning("Cookie文件格式错误，将创建新文件")
-                    existing_cookies = []
-
-            # 查找是否已存在该用户的Cookie
-            user_found = False
-            for i, existing_cookie in enumerate(existing_cookies):
-                if existing_cookie.get('user_id') == user['num']:
-                    # 用户已存在，覆盖
-                    existing_cookies[i] = cookie_data
-                    user_found = True
-                    self.logger.info(f"更新用户 {user['num']} 的Cookie")
-                    print(f"✅ 用户 {user['num']} 的Cookie已更新")
-                    break
-
-            if not user_found:
-                # 用户不存在，追加
-                existing_cookies.append(cookie_data)
+            if self.cookie_store.put(user['num'], cookie_data):
+                self.logger.info(f"更新用户 {user['num']} 的Cookie")
+                print(f"✅ 用户 {user['num']} 的Cookie已更新")
+            else:
                 self.logger.info(f"添加用户 {user['num']} 的Cookie")
                 print(f"✅ 用户 {user['num']} 的Cookie已添加")
-
-            # 按user_id排序
-            existing_cookies.sort(key=lambda x: x.get('user_id', 0))
-
-            # 保存更新后的cookies
-            with open(self.cookie_file, 'w', encoding='utf-8') as f:
-                json.dump(existing_cookies, f, ensure_ascii=False, indent=2)
-
             return True
 
         except Exception as e:
@@ -255,12 +334,8 @@ class AuthManager:
             print(f"❌ 保存Cookie时出错: {str(e)}")
             return False
 
-    def _selenium_login(self, user):
-        """使用Selenium模拟登录获取Cookie"""
-        self.logger.info(f"开始登录: {user['email']}")
-        print(f"\n🔑 开始使用账号 {user['email']} 登录...")
-
-        # 配置Chrome选项
+    def _chrome_options(self):
+        """根据 Config.CHROME_OPTIONS 生成 Chrome 启动选项"""
         chrome_options = Options()
         for option, value in Config.CHROME_OPTIONS.items():
             if isinstance(value, bool) and value:
@@ -271,123 +346,96 @@ class AuthManager:
         chrome_options.add_experimental_option('excludeSwitches', ['enable-logging', 'enable-automation'])
         chrome_options.add_experimental_option('useAutomationExtension', False)
         chrome_options.set_capability('acceptInsecureCerts', True)
-
-        # 获取ChromeDriver路径
-        chromedriver_path = self._get_chromedriver_path()
-
+        return chrome_options
+
+    def _create_driver(self, chromedriver_path=None):
+        """启动一个 Chrome 浏览器，未指定 chromedriver_path 时只在第一次启动时获取"""
+        if chromedriver_path is None:
+            with self._driver_lock:
+                if self._chromedriver_path is None:
+                    self._chromedriver_path = self._get_chromedriver_path()
+            chromedriver_path = self._chromedriver_path
+        service = Service(executable_path=chromedriver_path)
+        return webdriver.Chrome(service=service, options=self._chrome_options())
+
+    def _reset_driver(self, driver):
+        """清除浏览器中的 Cookie 和网站存储，供下一个账号复用"""
         try:
-            service = Service(executable_path=chromedriver_path)
-
-            # 启动浏览器
-            driver = webdriver.Chrome(service=service, options=chrome_options)
-            wait = WebDriverWait(driver, 15)  # 增加等待时间
-
-            try:
-                # 访问首页
-                driver.get(Config.BASE_URL)
-
-                # 等待页面加载完成（等待登录按钮出现）
-                wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, ".enroll_box")))
-
-                # 点击登录按钮打开登录界面
-                login_btn = wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, ".enroll_box a[onclick*='code: 1']")))
-                login_btn.click()
-
-                # 等待登录框出现
-                wait.until(EC.presence_of_element_located((By.CLASS_NAME, "login_box")))
+            driver.execute_cdp_cmd('Network.clearBrowserCookies', {})
+            driver.execute_cdp_cmd('Storage.clearDataForOrigin', {
+                'origin': Config.BASE_URL.rstrip('/'),
+                'storageTypes': 'all'
+            })
+        except WebDriverException:
+            # 不支持 CDP 时只能清除当前页面所在站点的数据
+            driver.execute_script('window.localStorage.clear(); window.sessionStorage.clear();')
+            driver.delete_all_cookies()
+        driver.get('about:blank')
+
+    def _login_user(self, user):
+        """按登录方式登录单个账号，失败时退出程序"""
+        try:
+            if self._try_http_login(user):
+                return
+        except Exception as e:
+            self.logger.exception(f"HTTP登录失败: {str(e)}")
+            print(f"❌ 登录过程中出错: {str(e)}")
+            sys.exit(1)
+        self._selenium_login(user)
 
-                # 输入邮箱和密码
-                email_input = wait.until(EC.presence_of_element_located((By.NAME, "login_name")))
-                email_input.clear()
-                email_input.send_keys(user['email'])
+    def _try_http_login(self, user):
+        """尝试不启动浏览器登录，成功返回 True；页面需要 JS 且允许改用浏览器时返回 False"""
+        if self.login_method == 'browser' or self._http_unsupported:
+            return False
 
-                password_input = wait.until(EC.presence_of_element_located((By.NAME, "login_password")))
-                password_input.clear()
-                password_input.send_keys(user['password'])
+        self.logger.info(f"开始HTTP登录: {user['email']}")
+        print(f"\n🔑 开始使用账号 {user['email']} 登录（HTTP）...")
+        try:
+            cookie_string, token = HttpLogin(self.captcha_solver).login(user['email'], user['password'])
+        except LoginRequiresBrowser as e:
+            if self.login_method == 'http':
+                raise
+            self._http_unsupported = True
+            self.logger.info(f"HTTP登录不可用，改用浏览器: {str(e)}")
+            print(f"🌐 {str(e)}，改用浏览器登录")
+            return False
 
-                # 处理验证码
-                print("🔍 正在识别验证码...")
-                captcha_image = wait.until(EC.presence_of_element_located((By.ID, "login_captche_img")))
+        print("✅ 登录成功！")
+        self._store_login_cookie(user, cookie_string, token.value, token.expires)
+        return True
 
-                max_captcha_attempts = 3
-                for attempt in range(max_captcha_attempts):
-                    try:
-                        # 等待验证码图片加载完成
-                        time.sleep(1)
+    def _store_login_cookie(self, user, cookie_string, token, expiry):
+        """保存登录得到的Cookie，expiry 为 token 的过期时间戳（可能为 None）"""
+        self.logger.info("获取Cookie成功")
+        print("\n✅ Cookie获取成功！")
+        cookie_data = {
+            'user_id': user['num'],
+            'user_email': user['email'],
+            'token': token,
+            'Cookie': cookie_string,
+            'timestamp': datetime.now().timestamp(),
+            'expires': expiry,
+            'expires_date': datetime.fromtimestamp(expiry).strftime('%Y-%m-%d %H:%M:%S') if expiry else None
+        }
 
-                        # 识别验证码
-                        captcha_result = self.captcha_solver.solve_captcha(captcha_image, driver)
-                        print(f"🤖 验证码识别结果: {captcha_result}")
+        self._save_user_cookie(user, cookie_data)
 
-                        # 输入验证码
-                        captcha_input = wait.until(EC.presence_of_element_located((By.NAME, "check_code")))
-                        captcha_input.clear()
-                        captcha_input.send_keys(captcha_result)
+        print(f"✅ Cookie已保存，有效期至 {cookie_data.get('expires_date') or '未知'}")
 
-                        # 点击登录按钮
-                        submit_button = wait.until(EC.element_to_be_clickable((By.CLASS_NAME, "login_btn")))
-                        submit_button.click()
-
-                        # 等待登录结果
-                        time.sleep(2)
+    def _selenium_login(self, user):
+        """使用Selenium模拟登录获取Cookie"""
+        # 获取ChromeDriver路径，失败时解决方案已经输出
+        try:
+            chromedriver_path = self._get_chromedriver_path()
+        except Exception:
+            sys.exit(1)
 
-                        # 检查是否登录成功（有token cookie）
-                        token_cookie = driver.get_cookie('token')
-                        if token_cookie:
-                            print("✅ 登录成功！")
-                            break
-                        else:
-                            # 登录失败，可能是验证码错误，刷新验证码重试
-                            if attempt < max_captcha_attempts - 1:
-                                print(f"❌ 验证码可能错误，正在重试 ({attempt + 1}/{max_captcha_attempts})...")
-                                refresh_btn = driver.find_element(By.CSS_SELECTOR, ".captcha_box .refresh")
-                                refresh_btn.click()
-                                time.sleep(1)
-                            else:
-                                raise Exception("验证码识别失败次数过多")
+        try:
+            # 启动浏览器
+            driver = self._create_driver(chromedriver_path)
 
-                    except Exception as e:
-                        if attempt < max_captcha_attempts - 1:
-                            print(f"❌ 验证码处理失败，正在重试 ({attempt + 1}/{max_captcha_attempts}): {str(e)}")
-                            # 刷新验证码
-                            try:
-                                refresh_btn = driver.find_element(By.CSS_SELECTOR, ".captcha_box .refresh")
-                                refresh_btn.click()
-                                time.sleep(1)
-                            except:
-                                pass
-                        else:
-                            raise
-
-                # 获取所需的Cookie
-                token_cookie = driver.get_cookie('token')
-
-                if token_cookie:
-                    self.logger.info("获取Cookie成功")
-                    print("\n✅ Cookie获取成功！")
-
-                    # 将cookies转换为Header String格式
-                    cookies = driver.get_cookies()
-                    cookie_string = '; '.join([f"{cookie['name']}={cookie['value']}" for cookie in cookies])
-
-                    # 保存Cookie
-                    cookie_data = {
-                        'user_id': user['num'],
-                        'user_email': user['email'],
-                        'token': token_cookie['value'],
-                        'Cookie': cookie_string,
-                        'timestamp': datetime.now().timestamp(),
-                        'expires': token_cookie.get('expiry', None),
-                        'expires_date': datetime.fromtimestamp(token_cookie['expiry']).strftime('%Y-%m-%d %H:%M:%S') if 'expiry' in token_cookie else None
-                    }
-
-                    self._save_user_cookie(user, cookie_data)
-
-                    print(f"✅ Cookie已保存，有效期至 {cookie_data.get('expires_date', '未知')}")
-
-                else:
-                    self.logger.error("获取Cookie失败")
-                    print("❌ 获取Cookie失败")
+            try:
+                self._login_with_driver(driver, user)
 
             except TimeoutException:
                 self.logger.error("页面加载超时")
@@ -403,49 +451,48 @@ class AuthManager:
                 driver.quit()
 
         except WebDriverException as e:
-            self.logger.exception(f"启动浏览器时出错: {str(e)}")
-            print(f"\n❌ 启动浏览器时出错: {str(e)}")
-            print("\n❌ 错误: 无法启动浏览器，请确认：")
-            print("  1. Chrome 浏览器已正确安装")
-            print("  2. 网络连接正常（用于下载ChromeDriver）")
-            print("  3. 系统防火墙或杀毒软件未阻止程序运行")
+            self._report_browser_error(e)
             sys.exit(1)
 
+    def _report_browser_error(self, e):
+        """提示浏览器无法启动的常见原因"""
+        self.logger.exception(f"启动浏览器时出错: {str(e)}")
+        print(f"\n❌ 启动浏览器时出错: {str(e)}")
+        print("\n❌ 错误: 无法启动浏览器，请确认：")
+        print("  1. Chrome 浏览器已正确安装")
+        print("  2. 网络连接正常（用于下载ChromeDriver）")
+        print("  3. 系统防火墙或杀毒软件未阻止程序运行")
+
+    def _login_with_driver(self, driver, user):
+        """在已启动的浏览器中完成登录并保存Cookie，失败时抛出异常"""
+        self.logger.info(f"开始登录: {user['email']}")
+        print(f"\n🔑 开始使用账号 {user['email']} 登录...")
+
+        cookie_string, token_cookie = BrowserLogin(driver, self.captcha_solver).login(user['email'], user['password'])
+        if not token_cookie:
+            self.logger.error("获取Cookie失败")
+            raise Exception("获取Cookie失败")
+        self._store_login_cookie(user, cookie_string, token_cookie['value'], token_cookie.get('expiry'))
+
     def get_cookie(self, user_id=None):
-        """获取Cookie字符串，支持多用户查找"""
+        """获取Cookie字符串，支持多用户查找；文件未变化时直接使用内存中的数据"""
         try:
             if not self.cookie_file.exists():
                 self.logger.error("Cookie文件不存在")
                 return None
 
-            with open(self.cookie_file, 'r', encoding='utf-8') as f:
-                content = json.load(f)
-
-            if not isinstance(content, list):
-                self.logger.error("Cookie文件格式不正确，需要数组格式")
-                return None
-
-            cookies_list = content
-
             # 如果指定了user_id，查找特定用户
             if user_id is not None:
-                for cookie_data in cookies_list:
-                    if cookie_data.get('user_id') == user_id:
-                        validated_cookie = self._validate_cookie(cookie_data)
-                        if validated_cookie:
-                            return validated_cookie
-                        else:
-                            return None
+                cookie_data = self.cookie_store.get(user_id)
+                return self._validate_cookie(cookie_data) if cookie_data else None
 
-                return None
-            else:
-                # 如果没有指定user_id，返回第一个有效的Cookie
-                for cookie_data in cookies_list:
-                    validated_cookie = self._validate_cookie(cookie_data)
-                    if validated_cookie:
-                        return validated_cookie
+            # 如果没有指定user_id，返回第一个有效的Cookie
+            for cookie_data in self.cookie_store.all():
+                validated_cookie = self._validate_cookie(cookie_data)
+                if validated_cookie:
+                    return validated_cookie
 
-                return None
+            return None
 
         except Exception as e:
             self.logger.exception(f"获取Cookie时出错: {str(e)}")
@@ -0,0 +1,160 @@
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from .config import Config
+from .logger import setup_logger
+
+def parse_batch_file(path):
+    """读取批量下载列表，返回 [{'novel_id', 'start', 'end'}]
+
+    每行一部小说，格式为 "小说ID [起始章节[-结束章节]]"，# 之后为注释；
+    path 为 "-" 时从标准输入读取。未指定范围时 start / end 为 None。
+    """
+    if str(path) == '-':
+        lines = sys.stdin.read().splitlines()
+    else:
+        with open(path, 'r', encoding='utf-8') as f:
+            lines = f.read().splitlines()
+
+    entries = []
+    for line_no, line in enumerate(lines, 1):
+        fields = line.split('#', 1)[0].split()
+        if not fields:
+            continue
+        if len(fields) > 2:
+            raise ValueError(f"第{line_no}行格式错误: {line.strip()}")
+
+        start = end = None
+        if len(fields) == 2:
+            try:
+                first, _, last = fields[1].partition('-')
+                start = int(first) if first else 1
+                end = int(last) if last else None
+            except ValueError:
+                raise ValueError(f"第{line_no}行章节范围无效: {fields[1]}")
+            if start < 1 or (end is not None and end < start):
+                raise ValueError(f"第{line_no}行章节范围无效: {fields[1]}")
+
+        entries.append({'novel_id': fields[0], 'start': start, 'end': end})
+    return entries
+
+class BatchDownloader:
+    """批量下载队列
+
+    在同一个进程中依次调度多部小说，所有小说共用下载器的会话池、限速器、
+    缓存和章节线程池，因此章节请求的总并发数始终不超过下载器的 workers。
+    每部小说各自写入输出文件和进度，一部失败不影响其余小说。
+    """
+
+    def __init__(self, downloader, jobs=None):
+        """初始化批量下载，jobs 为同时进行的小说数量"""
+        self.logger = setup_logger('batch')
+        self.downloader = downloader
+        self.jobs = max(1, jobs or Config.BATCH_JOBS)
+
+    def _resolve_range(self, entry, resume):
+        """确定一部小说的下载范围，返回 (起始章节, 结束章节)，已下载完的返回 None"""
+        if entry['start'] is not None or not resume:
+            return entry['start'] or 1, entry['end']
+
+        progress = self.downloader.progress_mgr.get_novel_progress(entry['novel_id'])
+        if not progress:
+            return 1, None
+        if progress['next_chapter'] > progress['total_chapters']:
+            return None
+        return progress['next_chapter'], None
+
+    def _download(self, entry, resume):
+        """任务线程：下载一部小说，返回结果状态"""
+        novel_id = entry['novel_id']
+        if self.downloader.stop_event.is_set():
+            return 'cancelled'
+
+        chapter_range = self._resolve_range(entry, resume)
+        if chapter_range is None:
+            print(f"⏭️ 小说 {novel_id} 已下载完成，跳过")
+            return 'skipped'
+
+        start_chapter, end_chapter = chapter_range
+        completed = self.downloader.download_novel(novel_id, start_chapter=start_chapter, end_chapter=end_chapter)
+        return 'done' if completed else 'stopped'
+
+    def run(self, entries, resume=False):
+        """下载列表中的所有小说，返回 {小说ID: (状态, 错误信息)}
+
+        状态为 done、skipped、failed、stopped（中途停止，已保存进度）或
+        cancelled（尚未开始）；resume 为真时，未指定范围的小说从已保存的进度继续
+        """
+        # 同一部小说只下载一次，避免两个任务同时写同一个输出文件
+        queue = []
+        seen = set()
+        for entry in entries:
+            if entry['novel_id'] in seen:
+                self.logger.warning(f"批量列表中重复的小说ID，已忽略: {entry['novel_id']}")
+                continue
+            seen.add(entry['novel_id'])
+            queue.append(entry)
+
+        results = {}
+        started = time.monotonic()
+        print(f"📦 批量下载 {len(queue)} 部小说，同时进行 {self.jobs} 部，章节并发数 {self.downloader.workers}")
+
+        jobs = ThreadPoolExecutor(max_workers=self.jobs, thread_name_prefix='batch')
+        if not self.downloader.engine:
+            self.downloader.executor = ThreadPoolExecutor(
+                max_workers=self.downloader.workers, thread_name_prefix='chapter'
+            )
+        futures = {jobs.submit(self._download, entry, resume): entry['novel_id'] for entry in queue}
+        try:
+            pending = set(futures)
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    novel_id = futures[future]
+                    try:
+                        results[novel_id] = (future.result(), None)
+                    except Exception as e:
+                        self.logger.exception(f"批量下载小说 {novel_id} 失败: {str(e)}")
+                        print(f"❌ 小说 {novel_id} 下载失败: {str(e)}")
+                        results[novel_id] = ('failed', str(e))
+        except KeyboardInterrupt:
+            print("\n\n⚠️ 检测到 Ctrl+C，正在保存进行中小说的进度...")
+            self.downloader.stop_event.set()
+            for future, novel_id in futures.items():
+                if future.cancel():
+                    results[novel_id] = ('cancelled', None)
+            for future, novel_id in futures.items():
+                if novel_id not in results:
+                    try:
+                        results[novel_id] = (future.result(), None)
+                    except Exception as e:
+                        results[novel_id] = ('failed', str(e))
+        finally:
+            jobs.shutdown(wait=True)
+            if self.downloader.executor:
+                self.downloader.executor.shutdown(wait=True)
+                self.downloader.executor = None
+
+        self._report(queue, results, time.monotonic() - started)
+        return results
+
+    def _report(self, queue, results, elapsed):
+        """输出批量下载汇总"""
+        labels = {
+            'done': '✅ 完成', 'skipped': '⏭️ 跳过', 'failed': '❌ 失败',
+            'stopped': '⏸️ 已停止', 'cancelled': '🚫 未开始'
+        }
+        counts = {}
+        for status, _ in results.values():
+            counts[status] = counts.get(status, 0) + 1
+
+        print("\n📦 批量下载汇总：")
+        print("=" * 80)
+        for entry in queue:
+            status, error = results.get(entry['novel_id'], ('cancelled', None))
+            line = f"  {entry['novel_id']:<26} {labels[status]}"
+            print(f"{line}  {error}" if error else line)
+        print("=" * 80)
+        summary = '，'.join(f"{labels[status]} {count}" for status, count in counts.items())
+        print(f"⏱️ 用时 {elapsed:.0f} 秒：{summary}")
+        self.logger.info(f"批量下载结束，共 {len(queue)} 部，用时 {elapsed:.0f} 秒: {counts}")
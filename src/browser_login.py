@@ -0,0 +1,209 @@
+import time
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import NoAlertPresentException, TimeoutException, WebDriverException
+from .config import Config
+from .logger import setup_logger
+
+class BrowserLogin:
+    """在浏览器中完成登录的状态机
+
+    每个状态只等待页面上真正需要的事件（验证码图片加载完成、token Cookie 出现、
+    出现错误提示），事件发生后立即进入下一个状态，不再固定休眠。每次状态切换
+    的耗时都写入日志，便于查看时间花在哪一步。
+
+    状态: start -> form_ready -> captcha_loaded -> submitted -> logged_in
+    提交后出现错误提示或一直没有 token 时进入 rejected，刷新验证码后回到
+    captcha_loaded 重试，重试次数用尽后抛出异常。
+    """
+
+    MAX_CAPTCHA_ATTEMPTS = 3
+    # 提交后出现的错误提示（弹层或登录框内的提示文字）
+    ERROR_BANNER_SELECTOR = ".layui-layer-msg, .layui-layer-dialog, .login_box .error, .login_box .tips"
+
+    def __init__(self, driver, captcha_solver, timeout=None, submit_timeout=None):
+        """初始化浏览器登录
+
+        Args:
+            driver: 已启动的浏览器
+            captcha_solver: CaptchaSolver 实例，使用其 solve_captcha 识别验证码
+            timeout: 等待页面元素的超时时间（秒），默认 Config.LOGIN_WAIT_TIMEOUT
+            submit_timeout: 提交后等待结果的超时时间（秒），默认 Config.LOGIN_SUBMIT_TIMEOUT
+        """
+        self.logger = setup_logger('auth')
+        self.driver = driver
+        self.captcha_solver = captcha_solver
+        self.wait = WebDriverWait(driver, timeout or Config.LOGIN_WAIT_TIMEOUT)
+        self.submit_wait = WebDriverWait(driver, submit_timeout or Config.LOGIN_SUBMIT_TIMEOUT)
+        self._handlers = {
+            'start': self._open_form,
+            'form_ready': self._wait_captcha,
+            'captcha_loaded': self._submit,
+            'submitted': self._wait_outcome,
+            'rejected': self._refresh_captcha,
+        }
+
+    def login(self, email, password):
+        """登录并返回 (Cookie 字符串, token Cookie)，token 为 Selenium 的 Cookie 字典"""
+        self.email = email
+        self.password = password
+        self.attempt = 0
+        self.reason = None  # 上一次提交失败的原因
+        self._stale_banners = set()
+        self._submitted_src = None
+        self.transitions = []  # (原状态, 新状态, 耗时)
+
+        state = 'start'
+        login_started = attempt_started = time.monotonic()
+        while state != 'logged_in':
+            started = time.monotonic()
+            try:
+                next_state = self._handlers[state]()
+            except Exception as e:
+                # 页面都没有打开或重试次数用尽时直接失败，验证码环节出错按一次失败处理
+                if state in ('start', 'rejected') or self.attempt >= self.MAX_CAPTCHA_ATTEMPTS:
+                    raise
+                self.reason = str(e)
+                next_state = 'rejected'
+            self._transition(state, next_state, time.monotonic() - started)
+
+            if next_state == 'rejected':
+                self.logger.info(
+                    f"第 {self.attempt} 次验证码尝试失败，用时 {time.monotonic() - attempt_started:.2f} 秒: {self.reason}"
+                )
+                attempt_started = time.monotonic()
+            state = next_state
+
+        self.logger.info(f"浏览器登录成功: {email}，共 {self.attempt} 次验证码尝试，用时 {time.monotonic() - login_started:.2f} 秒")
+        token = self.driver.get_cookie('token')
+        cookie_string = '; '.join(f"{cookie['name']}={cookie['value']}" for cookie in self.driver.get_cookies())
+        return cookie_string, token
+
+    def _transition(self, state, next_state, elapsed):
+        """记录一次状态切换及其耗时"""
+        self.transitions.append((state, next_state, elapsed))
+        self.logger.info(f"登录状态 {state} -> {next_state}，用时 {elapsed:.2f} 秒")
+
+    def _open_form(self):
+        """打开首页和登录框，填写邮箱和密码"""
+        self.driver.get(Config.BASE_URL)
+
+        # 首页的登录按钮可点击即可打开登录框
+        login_btn = self.wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, ".enroll_box a[onclick*='code: 1']")))
+        login_btn.click()
+        self.wait.until(EC.presence_of_element_located((By.CLASS_NAME, "login_box")))
+
+        email_input = self.wait.until(EC.presence_of_element_located((By.NAME, "login_name")))
+        email_input.clear()
+        email_input.send_keys(self.email)
+
+        password_input = self.wait.until(EC.presence_of_element_located((By.NAME, "login_password")))
+        password_input.clear()
+        password_input.send_keys(self.password)
+        return 'form_ready'
+
+    def _captcha_image(self):
+        return self.wait.until(EC.visibility_of_element_located((By.ID, "login_captche_img")))
+
+    def _image_loaded(self, image):
+        """验证码图片已下载并完成解码"""
+        return self.driver.execute_script(
+            "return arguments[0].complete && arguments[0].naturalWidth > 0;", image
+        )
+
+    def _wait_captcha(self):
+        """等待验证码图片加载完成"""
+        print("🔍 正在识别验证码...")
+        image = self._captcha_image()
+        self.wait.until(lambda driver: self._image_loaded(image))
+        return 'captcha_loaded'
+
+    def _submit(self):
+        """识别验证码并提交登录表单"""
+        self.attempt += 1
+        image = self._captcha_image()
+        captcha_result = self.captcha_solver.solve_captcha(image, self.driver)
+        print(f"🤖 验证码识别结果: {captcha_result}")
+        if not captcha_result:
+            raise Exception("验证码识别失败")
+
+        captcha_input = self.wait.until(EC.presence_of_element_located((By.NAME, "check_code")))
+        captcha_input.clear()
+        captcha_input.send_keys(captcha_result)
+
+        # 提交前已经显示的错误提示不能当作本次提交的结果
+        self._stale_banners = set(self._visible_banners())
+        self._submitted_src = image.get_attribute('src')
+        submit_button = self.wait.until(EC.element_to_be_clickable((By.CLASS_NAME, "login_btn")))
+        submit_button.click()
+        return 'submitted'
+
+    def _visible_banners(self):
+        return [
+            banner for banner in self.driver.find_elements(By.CSS_SELECTOR, self.ERROR_BANNER_SELECTOR)
+            if banner.is_displayed()
+        ]
+
+    def _outcome(self, driver):
+        """提交结果：出现 token 返回 'logged_in'，出现错误提示返回 'rejected'，都没有返回 False"""
+        # 弹窗未关闭时其他命令都会失败，先检查弹窗
+        try:
+            alert = driver.switch_to.alert
+            self.reason = alert.text
+            alert.accept()
+            return 'rejected'
+        except NoAlertPresentException:
+            pass
+
+        if driver.get_cookie('token'):
+            return 'logged_in'
+
+        for banner in self._visible_banners():
+            if banner not in self._stale_banners:
+                self.reason = banner.text.strip() or "页面提示登录失败"
+                return 'rejected'
+
+        # 验证码错误时网站会自动换一张验证码
+        images = driver.find_elements(By.ID, "login_captche_img")
+        if images and images[0].get_attribute('src') != self._submitted_src:
+            self.reason = "验证码已被网站刷新，验证码可能错误"
+            return 'rejected'
+        return False
+
+    def _wait_outcome(self):
+        """等待 token Cookie 或错误提示出现"""
+        try:
+            state = self.submit_wait.until(self._outcome)
+        except TimeoutException:
+            self.reason = "提交后未获得token，验证码可能错误"
+            return 'rejected'
+        if state == 'logged_in':
+            print("✅ 登录成功！")
+        return state
+
+    def _refresh_captcha(self):
+        """刷新验证码并等待新图片加载完成，重试次数用尽时抛出异常"""
+        if self.attempt >= self.MAX_CAPTCHA_ATTEMPTS:
+            raise Exception(f"验证码识别失败次数过多: {self.reason}")
+        print(f"❌ {self.reason}，正在重试 ({self.attempt}/{self.MAX_CAPTCHA_ATTEMPTS})...")
+
+        image = self._captcha_image()
+        old_src = image.get_attribute('src')
+        if old_src != self._submitted_src and self._image_loaded(image):
+            # 网站已经自动换了新验证码
+            return 'captcha_loaded'
+        try:
+            self.driver.find_element(By.CSS_SELECTOR, ".captcha_box .refresh").click()
+        except WebDriverException as e:
+            self.logger.warning(f"刷新验证码失败: {str(e)}")
+        try:
+            # 刷新后图片地址会变化，等新图片加载完成
+            self.submit_wait.until(
+                lambda driver: image.get_attribute('src') != old_src and self._image_loaded(image)
+            )
+        except (TimeoutException, WebDriverException):
+            # 图片地址不变或元素被替换时，等重新找到的图片加载完成
+            image = self._captcha_image()
+            self.wait.until(lambda driver: self._image_loaded(image))
+        return 'captcha_loaded'
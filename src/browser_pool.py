@@ -0,0 +1,96 @@
+import queue
+import threading
+from contextlib import contextmanager
+from .logger import setup_logger
+
+class BrowserPool:
+    """常驻浏览器池
+
+    最多保持 size 个浏览器，按需启动；一个账号用完后清除 Cookie 和网站存储
+    再交给下一个账号，省去每个账号冷启动浏览器的时间。使用中出错的浏览器
+    状态不可信，直接关闭，下次需要时重新启动。
+    """
+
+    def __init__(self, factory, reset, size):
+        """初始化浏览器池
+
+        Args:
+            factory: 启动一个浏览器的函数
+            reset: 清除浏览器状态的函数，参数为浏览器
+            size: 浏览器数量上限
+        """
+        self.logger = setup_logger('browser_pool')
+        self.factory = factory
+        self.reset = reset
+        self.size = max(1, size)
+        self.launched = 0  # 启动过的浏览器数
+        self.reused = 0  # 复用已有浏览器的次数
+        self._idle = queue.LifoQueue()
+        self._all = set()
+        self._slots = threading.BoundedSemaphore(self.size)
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @contextmanager
+    def acquire(self):
+        """取得一个浏览器，用完后自动清理并放回池中"""
+        self._slots.acquire()
+        driver = None
+        try:
+            try:
+                driver = self._idle.get_nowait()
+                with self._lock:
+                    self.reused += 1
+            except queue.Empty:
+                driver = self.factory()
+                with self._lock:
+                    self._all.add(driver)
+                    self.launched += 1
+                self.logger.info(f"启动浏览器，当前共 {len(self._all)} 个")
+
+            yield driver
+        except BaseException:
+            if driver is not None:
+                self._quit(driver)
+            raise
+        else:
+            self._release(driver)
+        finally:
+            self._slots.release()
+
+    def _release(self, driver):
+        """清除浏览器状态后放回池中；清除失败只关闭这个浏览器，不影响使用方的结果"""
+        try:
+            self.reset(driver)
+        except Exception as e:
+            self.logger.warning(f"清除浏览器状态失败，关闭该浏览器: {str(e)}")
+            self._quit(driver)
+            return
+        if self._closed:
+            self._quit(driver)
+        else:
+            self._idle.put(driver)
+
+    def _quit(self, driver):
+        """关闭浏览器并移出池"""
+        with self._lock:
+            self._all.discard(driver)
+        try:
+            driver.quit()
+        except Exception as e:
+            self.logger.warning(f"关闭浏览器失败: {str(e)}")
+
+    def close(self):
+        """关闭所有浏览器，包括正在使用中的"""
+        self._closed = True
+        with self._lock:
+            drivers = list(self._all)
+        for driver in drivers:
+            self._quit(driver)
+        self.logger.info(f"浏览器池已关闭，共启动 {self.launched} 个浏览器，复用 {self.reused} 次")
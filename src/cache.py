@@ -0,0 +1,205 @@
+import json
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from .config import Config
+from .logger import setup_logger
+
+class ChapterCache:
+    """章节正文缓存
+
+    以章节URL为键，把提取后的正文保存在 DATA_DIR 下的 SQLite 文件中。
+    总大小超过上限时按最近访问时间淘汰（LRU）。
+    """
+
+    def __init__(self, cache_file=None, max_bytes=None):
+        """初始化章节缓存"""
+        self.logger = setup_logger('cache')
+        self.cache_file = cache_file or Config.CHAPTER_CACHE_FILE
+        self.max_bytes = max_bytes or Config.CHAPTER_CACHE_MAX_MB * 1024 * 1024
+        self._lock = threading.Lock()
+
+        # 确保数据目录存在
+        Config.DATA_DIR.mkdir(parents=True, exist_ok=True)
+
+        self._conn = sqlite3.connect(str(self.cache_file), check_same_thread=False)
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS chapters (
+                url TEXT PRIMARY KEY,
+                content TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created REAL NOT NULL,
+                accessed REAL NOT NULL
+            )
+        ''')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS idx_chapters_accessed ON chapters (accessed)')
+        self._conn.commit()
+        self._total = self._conn.execute('SELECT COALESCE(SUM(size), 0) FROM chapters').fetchone()[0]
+
+    def get(self, url):
+        """读取缓存的章节正文，未命中返回 None"""
+        with self._lock:
+            row = self._conn.execute('SELECT content FROM chapters WHERE url = ?', (url,)).fetchone()
+            if row is None:
+                return None
+            self._conn.execute('UPDATE chapters SET accessed = ? WHERE url = ?', (time.time(), url))
+            self._conn.commit()
+        self.logger.debug(f"缓存命中: {url}")
+        return row[0]
+
+    def put(self, url, content):
+        """写入章节正文，超出容量时淘汰最久未访问的章节"""
+        size = len(content.encode('utf-8'))
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute('SELECT size FROM chapters WHERE url = ?', (url,)).fetchone()
+            self._conn.execute(
+                'INSERT OR REPLACE INTO chapters (url, content, size, created, accessed) VALUES (?, ?, ?, ?, ?)',
+                (url, content, size, now, now)
+            )
+            self._total += size - (row[0] if row else 0)
+            if self._total > self.max_bytes:
+                self._evict(self.max_bytes)
+            self._conn.commit()
+
+    def _evict(self, max_bytes):
+        """按LRU淘汰章节直到总大小不超过 max_bytes（调用方需持有锁），返回淘汰数量"""
+        removed = 0
+        cursor = self._conn.execute('SELECT url, size FROM chapters ORDER BY accessed')
+        victims = []
+        for url, size in cursor:
+            if self._total <= max_bytes:
+                break
+            victims.append((url,))
+            self._total -= size
+            removed += 1
+        self._conn.executemany('DELETE FROM chapters WHERE url = ?', victims)
+        if removed:
+            self.logger.info(f"缓存淘汰 {removed} 个章节，当前大小 {self._total / 1024 / 1024:.1f}MB")
+        return removed
+
+    def prune(self, max_mb=None):
+        """手动清理缓存到指定大小（MB），默认清理到配置的上限，返回淘汰数量"""
+        max_bytes = self.max_bytes if max_mb is None else int(max_mb * 1024 * 1024)
+        with self._lock:
+            self._total = self._conn.execute('SELECT COALESCE(SUM(size), 0) FROM chapters').fetchone()[0]
+            removed = self._evict(max_bytes)
+            self._conn.commit()
+            self._conn.execute('VACUUM')
+        return removed
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._conn.execute('DELETE FROM chapters')
+            self._conn.commit()
+            self._conn.execute('VACUUM')
+            self._total = 0
+        self.logger.info("清空章节缓存")
+
+    def stats(self):
+        """返回缓存统计信息"""
+        with self._lock:
+            count, total, oldest, newest = self._conn.execute(
+                'SELECT COUNT(*), COALESCE(SUM(size), 0), MIN(accessed), MAX(accessed) FROM chapters'
+            ).fetchone()
+        return {
+            'count': count,
+            'size': total,
+            'max_size': self.max_bytes,
+            'oldest_access': oldest,
+            'newest_access': newest
+        }
+
+    def view_stats(self):
+        """查看缓存统计信息"""
+        stats = self.stats()
+
+        def format_time(timestamp):
+            return datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d %H:%M:%S') if timestamp else '-'
+
+        print("\n🗄️ 章节缓存统计：")
+        print("=" * 60)
+        print(f"  缓存文件：{self.cache_file}")
+        print(f"  章节数量：{stats['count']}")
+        print(f"  占用大小：{stats['size'] / 1024 / 1024:.1f}MB / {stats['max_size'] / 1024 / 1024:.0f}MB")
+        print(f"  最早访问：{format_time(stats['oldest_access'])}")
+        print(f"  最近访问：{format_time(stats['newest_access'])}")
+        print("=" * 60)
+
+    def close(self):
+        """关闭数据库连接"""
+        with self._lock:
+            self._conn.close()
+
+class CatalogCache:
+    """小说目录缓存
+
+    get_novel_info 的解析结果同时保存在进程内存和 DATA_DIR/catalogs 下的
+    JSON 文件中，超过 TTL 后视为过期。
+    """
+
+    # 进程内共享的内存缓存：novel_id -> (获取时间, 小说信息)
+    _memory = {}
+    _lock = threading.Lock()
+
+    def __init__(self, cache_dir=None, ttl=None):
+        """初始化目录缓存"""
+        self.logger = setup_logger('cache')
+        self.cache_dir = cache_dir or Config.CATALOG_CACHE_DIR
+        self.ttl = Config.CATALOG_CACHE_TTL if ttl is None else ttl
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, novel_id):
+        """目录缓存文件路径"""
+        return self.cache_dir / f"{re.sub(r'[^0-9A-Za-z_-]', '_', str(novel_id))}.json"
+
+    def get(self, novel_id):
+        """读取未过期的目录缓存，未命中返回 None"""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(novel_id)
+        if entry is None:
+            entry = self._load(novel_id)
+            if entry is None:
+                return None
+            with self._lock:
+                self._memory[novel_id] = entry
+
+        fetched_at, info = entry
+        if now - fetched_at > self.ttl:
+            self.logger.debug(f"目录缓存已过期: {novel_id}")
+            return None
+        return info
+
+    def _load(self, novel_id):
+        """从磁盘读取目录缓存"""
+        path = self._path(novel_id)
+        if not path.exists():
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            info = data['info']
+            # JSON 中的元组会变成列表，还原为与解析结果一致的结构
+            info['volumes'] = [
+                (volume_title, [tuple(chapter) for chapter in chapters])
+                for volume_title, chapters in info['volumes']
+            ]
+            return data['fetched_at'], info
+        except Exception as e:
+            self.logger.warning(f"读取目录缓存失败: {path}, 错误: {str(e)}")
+            return None
+
+    def put(self, novel_id, info):
+        """写入目录缓存"""
+        entry = (time.time(), info)
+        with self._lock:
+            self._memory[novel_id] = entry
+        try:
+            with open(self._path(novel_id), 'w', encoding='utf-8') as f:
+                json.dump({'fetched_at': entry[0], 'info': info}, f, ensure_ascii=False)
+        except Exception as e:
+            self.logger.warning(f"保存目录缓存失败: {novel_id}, 错误: {str(e)}")
@@ -43,6 +43,25 @@ class CaptchaSolver:
             self.logger.exception(f"验证码识别失败: {str(e)}")
             raise
 
+    def solve_image(self, image_bytes):
+        """
+        识别直接下载的验证码图片
+        Args:
+            image_bytes: 验证码图片的原始字节（任意 PIL 支持的格式）
+        Returns:
+            str: 识别结果
+        """
+        try:
+            image = Image.open(io.BytesIO(image_bytes))
+            result = self._call_ai_api(self._image_to_base64(image))
+
+            self.logger.info(f"验证码识别结果: {result}")
+            return result
+
+        except Exception as e:
+            self.logger.exception(f"验证码识别失败: {str(e)}")
+            raise
+
     def _capture_captcha_image(self, image_element, driver):
         """截取验证码图片"""
         try:
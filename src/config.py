@@ -1,7 +1,6 @@
 import os
 import sys
 from pathlib import Path
-import json
 from dotenv import load_dotenv
 
 class Config:
@@ -22,17 +21,89 @@ class Config:
 
     # ChromeDriver管理配置
     WEBDRIVER_CACHE_DIR = ROOT_DIR / ".wdm"
+    CHROMEDRIVER_CACHE_FILE = WEBDRIVER_CACHE_DIR / "chromedriver.json"  # 已解析的驱动路径和对应的 Chrome 版本
 
     # 文件配置
     COOKIE_FILE = DATA_DIR / "cookies.json"
     USERS_FILE = CONFIG_DIR / "users.txt"
-    PROGRESS_FILE = DATA_DIR / "progress.json"
+    PROGRESS_FILE = DATA_DIR / "progress.json"  # 旧版进度文件，启动时自动迁移到数据库
+    PROGRESS_DB_FILE = DATA_DIR / "progress.db"
+    CHAPTER_CACHE_FILE = DATA_DIR / "chapter_cache.db"
+    CATALOG_CACHE_DIR = DATA_DIR / "catalogs"
+    SNAPSHOT_DIR = DATA_DIR / "snapshots"
+    WATCH_FILE = CONFIG_DIR / "watch.txt"
+    WATCH_STATUS_FILE = DATA_DIR / "watch_status.json"
+    HTTP_ARCHIVE_FILE = DATA_DIR / "http_archive.db"  # download --record / --replay 的默认存档文件
+    REPLAY_DATA_DIR = DATA_DIR / "replay"  # 回放模式的进度和快照
+    REPLAY_OUTPUT_DIR = OUTPUT_DIR / "replay"  # 回放模式的输出文件
     # CHROMEDRIVER_PATH = ROOT_DIR / "chromedriver.exe"
 
     # 网络请求配置
     RETRY_COUNT = 3
-    RETRY_DELAY = 5
-    CHAPTER_DELAY = 5
+    RETRY_DELAY = 5  # 指数退避的基础间隔（秒），第n次重试最多等待 RETRY_DELAY * 2^(n-1)
+    RETRY_MAX_DELAY = 60  # 单次退避等待的上限（秒）
+    RETRY_AFTER_MAX = 300  # 最多遵从多长的 Retry-After（秒）
+    CONNECT_TIMEOUT = 10  # 建立连接的超时时间（秒）
+    READ_TIMEOUT = 30  # 等待响应数据的超时时间（秒）
+    HTTP_POOL_CONNECTIONS = 4  # 每个 Session 缓存连接池的主机数
+    HTTP_POOL_MAXSIZE = None  # 每个主机保持的最大连接数，默认为并发数的2倍（留给对冲请求）
+    HTTP_KEEPALIVE_EXPIRY = 30  # 异步引擎空闲连接的保持时间（秒）
+    HTTP2 = False  # 异步引擎是否启用 HTTP/2 多路复用（需要安装 h2）
+    HEDGE_REQUESTS = False  # 章节请求超过历史耗时分位数时是否发送对冲请求
+    HEDGE_QUANTILE = 0.95  # 触发对冲的耗时分位数
+    HEDGE_MIN_SAMPLES = 20  # 至少统计多少次请求耗时后才开始对冲
+    HEDGE_MIN_DELAY = 0.5  # 对冲阈值的下限（秒）
+    DOWNLOAD_WORKERS = 3  # 并发下载章节的线程数
+    FETCH_ENGINE = "sync"  # 下载引擎: sync (requests) 或 async (asyncio + httpx)
+    ASYNC_CONCURRENCY = 10  # 异步引擎的默认在途请求数
+    PARSER_BACKEND = "auto"  # HTML解析器: auto（优先 lxml）、lxml 或 html.parser
+    PARSE_WORKERS = 2  # 解析章节页面的线程数，与抓取并行进行
+    PARSE_PROCESSES = 0  # 解析章节页面的子进程数，大于0时绕开 GIL 用多核解析（取代解析线程）
+    PIPELINE_WINDOW = None  # 已提交但尚未写入文件的章节数上限，默认为并发数*2+解析线程数
+    BATCH_JOBS = 2  # 批量下载时同时进行的小说数量，章节请求共用 DOWNLOAD_WORKERS
+
+    # 自适应限速配置（按主机的令牌桶，单位：次/秒）
+    RATE_LIMIT_INITIAL = 0.5  # 初始请求速率
+    RATE_LIMIT_MIN = 0.1  # 速率下限
+    RATE_LIMIT_MAX = 5.0  # 速率上限
+    RATE_LIMIT_BURST = 2  # 令牌桶容量，允许的瞬时突发请求数
+    RATE_LIMIT_INCREASE = 0.05  # 每次健康响应后的加性增量
+    RATE_LIMIT_DECREASE = 0.5  # 遇到 429/5xx/网络错误时的乘性因子
+    RATE_LIMIT_LATENCY_FACTOR = 2.0  # 平均耗时超过基准的倍数时视为服务端变慢
+
+    # 多账号会话池配置
+    USE_ACCOUNT_POOL = False  # 未指定 --user 时是否使用所有已登录账号
+    POOL_REFRESH_INTERVAL = 60  # 重新读取账号Cookie的间隔（秒）
+    POOL_SUSPEND_SECONDS = 300  # Cookie失效或被限流的账号暂停调度的时长（秒）
+    POOL_THROTTLE_LIMIT = 3  # 连续收到多少次 429 后暂停该账号
+
+    # 断路器配置（按主机）
+    BREAKER_WINDOW = 20  # 统计失败率的最近请求数
+    BREAKER_MIN_REQUESTS = 10  # 至少有多少次请求后才判断失败率
+    BREAKER_FAILURE_RATE = 0.5  # 失败率达到该值时断开，暂停所有请求
+    BREAKER_COOLDOWN = 30  # 断开后暂停的秒数，试探失败时加倍
+    BREAKER_MAX_COOLDOWN = 600  # 暂停时长上限（秒）
+
+    # 章节缓存配置
+    CHAPTER_CACHE_ENABLED = True  # 下载章节时是否读写本地缓存
+    CHAPTER_CACHE_MAX_MB = 500  # 缓存容量上限，超出后按最近访问时间淘汰
+    CATALOG_CACHE_TTL = 3600  # 小说目录缓存的有效期（秒）
+
+    # 定时轮询配置（watch 命令）
+    WATCH_INTERVAL = 1800  # 基础轮询间隔（秒），有新章节后恢复为该值
+    WATCH_MAX_INTERVAL = 86400  # 长期没有更新时轮询间隔的上限（秒）
+    WATCH_BACKOFF = 1.5  # 每次没有更新时轮询间隔的放大倍数
+    WATCH_JITTER = 0.1  # 轮询时间的随机抖动比例
+    WATCH_RELOAD_INTERVAL = 60  # 检查关注列表文件是否修改的间隔（秒）
+
+    # 进度管理配置
+    PROGRESS_PAGE_SIZE = 20  # progress --view 分页显示时每页的记录数
+
+    # 登录配置
+    LOGIN_METHOD = "auto"  # 登录方式: auto（优先 HTTP，页面需要 JS 时改用浏览器）、http 或 browser
+    LOGIN_PARALLELISM = 3  # login --user all 时常驻的浏览器数，也是同时登录的账号数
+    LOGIN_WAIT_TIMEOUT = 15  # 浏览器登录时等待页面元素的超时时间（秒）
+    LOGIN_SUBMIT_TIMEOUT = 5  # 提交登录后等待 token 或错误提示的超时时间（秒），超时按验证码错误重试
 
     # 浏览器配置
     CHROME_OPTIONS = {
@@ -101,7 +172,8 @@ def setup_directories():
             f.write("# 账号配置文件，每行一个账号，格式为：编号. 邮箱 密码\n")
             f.write("# 例如：1. example@mail.com password123\n")
 
-    # 创建默认的进度文件
-    if not Config.PROGRESS_FILE.exists():
-        with open(Config.PROGRESS_FILE, 'w', encoding='utf-8') as f:
-            json.dump({}, f, ensure_ascii=False, indent=2)
+    # 创建默认的watch.txt文件
+    if not Config.WATCH_FILE.exists():
+        with open(Config.WATCH_FILE, 'w', encoding='utf-8') as f:
+            f.write("# 关注列表，每行一部小说，格式为：小说ID [轮询间隔分钟]\n")
+            f.write("# 例如：12345 60\n")
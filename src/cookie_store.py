@@ -0,0 +1,126 @@
+import json
+import os
+import threading
+from contextlib import contextmanager
+from .logger import setup_logger
+
+try:
+    import fcntl
+except ImportError:  # Windows 使用 msvcrt 加锁
+    fcntl = None
+    import msvcrt
+
+class CookieStore:
+    """Cookie 文件的内存缓存
+
+    解析后的 Cookie 按 user_id 索引保存在内存中，只有文件的修改时间或大小
+    变化（其他进程写入）时才重新读取。写入时持有跨进程的建议性文件锁，
+    在锁内重新读取最新内容后修改，先写临时文件再替换，并行的 login 和
+    download 进程不会互相覆盖对方的 Cookie。
+    """
+
+    def __init__(self, cookie_file):
+        """初始化 Cookie 缓存"""
+        self.logger = setup_logger('auth')
+        self.cookie_file = cookie_file
+        self.lock_file = cookie_file.with_name(cookie_file.name + '.lock')
+        self._lock = threading.RLock()
+        self._signature = None  # 已加载文件的 (修改时间, 大小)
+        self._cookies = []  # 按文件顺序排列的 Cookie 数据
+        self._by_user = {}  # user_id -> Cookie 数据
+
+    def _stat_signature(self):
+        """文件的 (修改时间, 大小)，文件不存在返回 None"""
+        try:
+            stat = os.stat(self.cookie_file)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _read(self):
+        """读取并解析 Cookie 文件，不存在或格式错误时返回空列表"""
+        try:
+            with open(self.cookie_file, 'r', encoding='utf-8') as f:
+                content = json.load(f)
+        except FileNotFoundError:
+            return []
+        except json.JSONDecodeError:
+            self.logger.warning("Cookie文件格式错误，按空文件处理")
+            return []
+        if not isinstance(content, list):
+            self.logger.error("Cookie文件格式不正确，需要数组格式")
+            return []
+        return content
+
+    def _index(self, cookies, signature):
+        """替换内存中的 Cookie 数据（调用方需持有锁）"""
+        self._cookies = cookies
+        self._by_user = {}
+        for cookie in cookies:
+            # 与线性查找一致，同一用户有多条记录时以第一条为准
+            self._by_user.setdefault(cookie.get('user_id'), cookie)
+        self._signature = signature
+
+    def _refresh(self):
+        """文件变化时重新加载（调用方需持有锁）"""
+        signature = self._stat_signature()
+        if signature != self._signature:
+            # 先取签名再读文件，读取期间被修改时下次调用会再次加载
+            self._index(self._read(), signature)
+            self.logger.debug(f"重新加载Cookie文件: {len(self._cookies)} 条记录")
+
+    def get(self, user_id):
+        """获取指定用户的 Cookie 数据，不存在返回 None"""
+        with self._lock:
+            self._refresh()
+            return self._by_user.get(user_id)
+
+    def all(self):
+        """按文件顺序返回所有 Cookie 数据"""
+        with self._lock:
+            self._refresh()
+            return list(self._cookies)
+
+    @contextmanager
+    def _file_lock(self):
+        """跨进程的建议性排他锁，只约束同样加锁的写入方"""
+        self.lock_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.lock_file, 'a+b') as f:
+            if fcntl:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            else:
+                f.seek(0)
+                # LK_LOCK 在拿不到锁时重试约10秒后报错，继续重试直到成功
+                while True:
+                    try:
+                        msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                        break
+                    except OSError:
+                        continue
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+                else:
+                    f.seek(0)
+                    msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+    def put(self, user_id, cookie_data):
+        """写入指定用户的 Cookie 数据，返回该用户此前是否已有记录"""
+        with self._lock, self._file_lock():
+            # 持锁后重新读取，保留其他进程刚写入的 Cookie
+            current = self._read()
+            cookies = [cookie for cookie in current if cookie.get('user_id') != user_id]
+            existed = len(cookies) != len(current)
+            cookies.append(cookie_data)
+            cookies.sort(key=lambda cookie: cookie.get('user_id', 0))
+
+            temp_path = self.cookie_file.with_name(self.cookie_file.name + '.tmp')
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(cookies, f, ensure_ascii=False, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, self.cookie_file)
+            self._index(cookies, self._stat_signature())
+        return existed
@@ -1,42 +1,136 @@
 import requests
-from bs4 import BeautifulSoup
 import time
 import re
 import sys
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from itertools import islice
+from urllib3.util.request import ACCEPT_ENCODING
 from .config import Config
 from .auth import AuthManager
 from .logger import setup_logger
 from .progress import ProgressManager
+from .async_engine import AsyncFetchEngine
+from .session_pool import SessionPool
+from .cache import ChapterCache, CatalogCache
+from .sync import SnapshotManager
+from .parser import get_parser, ProcessParsePool
+from .retry import RetryPolicy
+from .hedge import HedgedFetcher
+from .repair import ChapterHole
+from .singleflight import SingleFlight, request_key
+from .archive import HttpArchive
 
 class NovelDownloader:
     """小说下载器核心类"""
 
-    def __init__(self, user_id=None):
-        """初始化下载器"""
+    def __init__(self, user_id=None, workers=None, engine=None, use_pool=None, use_cache=None, hedge=None,
+                 http2=None, parse_processes=None, archive_mode=None, archive_file=None):
+        """初始化下载器
+
+        engine 为 'sync'（requests.Session + 线程池）或 'async'（asyncio + httpx）；
+        use_pool 为真且未指定 user_id 时，使用所有Cookie有效的账号组成会话池；
+        use_cache 控制是否读写章节缓存，默认取 Config.CHAPTER_CACHE_ENABLED；
+        hedge 控制章节请求是否对冲，默认取 Config.HEDGE_REQUESTS；
+        http2 为真时使用 HTTP/2（只有 async 引擎支持，未指定引擎时自动选择 async）；
+        parse_processes 为章节解析子进程数，默认取 Config.PARSE_PROCESSES，0 表示在线程中解析；
+        archive_mode 为 'record' 时把响应写入 archive_file（默认 Config.HTTP_ARCHIVE_FILE），
+        为 'replay' 时只从存档读取响应，不登录也不发送网络请求；两种模式都跳过章节和目录缓存，
+        记录时所有页面都从网络获取，存档才完整
+        """
         self.logger = setup_logger('downloader')
         self.auth = AuthManager()
-        self.progress_mgr = ProgressManager()
-        self.session = requests.Session()
+        self.archive = HttpArchive(archive_file, archive_mode) if archive_mode else None
+        self.replaying = archive_mode == 'replay'
+        # 回放的输出文件、进度和快照单独存放，不影响正常下载的记录
+        self.output_dir = Config.REPLAY_OUTPUT_DIR if self.replaying else Config.OUTPUT_DIR
+        if self.replaying:
+            Config.REPLAY_DATA_DIR.mkdir(parents=True, exist_ok=True)
+            self.progress_mgr = ProgressManager(Config.REPLAY_DATA_DIR / "progress.db")
+        else:
+            self.progress_mgr = ProgressManager()
         self.user_id = user_id
+        http2 = Config.HTTP2 if http2 is None else http2
+        if self.replaying:
+            # 回放时所有请求都在 get_response 中由存档直接返回
+            engine, http2 = 'sync', False
+        self.engine_name = engine or ('async' if http2 else Config.FETCH_ENGINE)
+        if self.engine_name not in ('sync', 'async'):
+            raise ValueError(f"未知的下载引擎: {self.engine_name}")
+        if http2 and self.engine_name == 'sync':
+            self.logger.warning("requests 不支持 HTTP/2，sync 引擎继续使用 HTTP/1.1")
+            print("⚠️ sync 引擎不支持 HTTP/2，继续使用 HTTP/1.1（可改用 --engine async）")
+        default_workers = Config.ASYNC_CONCURRENCY if self.engine_name == 'async' else Config.DOWNLOAD_WORKERS
+        self.workers = max(1, workers or default_workers)
+        self.engine = None
+        self.pool = None
+        self.retry_policy = RetryPolicy()
+        self.hedge = Config.HEDGE_REQUESTS if hedge is None else hedge
+        self.hedger = None
+        # 合并并发的相同请求（批量下载中重复的小说、目录页重复获取等）
+        self.flight = SingleFlight()
+        # 批量下载时多部小说共用的章节线程池，为 None 时每次下载单独创建
+        self.executor = None
+        # 设置后正在进行的下载会在写完当前章节后保存进度并停止
+        self.stop_event = threading.Event()
+        if use_cache is None:
+            use_cache = Config.CHAPTER_CACHE_ENABLED
+        # 记录和回放都不使用章节缓存
+        self.chapter_cache = ChapterCache() if use_cache and not self.archive else None
+        self.catalog_cache = CatalogCache()
+        self.snapshots = SnapshotManager(Config.REPLAY_DATA_DIR / "snapshots" if self.replaying else None)
+        self.parser = get_parser()
+        if parse_processes is None:
+            parse_processes = Config.PARSE_PROCESSES
+        self.parse_pool = ProcessParsePool(self.parser.name, parse_processes) if parse_processes > 0 else None
         self.headers = {
-            'User-Agent': Config.USER_AGENT
+            'User-Agent': Config.USER_AGENT,
+            # 只声明已安装解码库的压缩格式（br 需要 brotli，zstd 需要 zstandard）
+            'Accept-Encoding': ACCEPT_ENCODING
         }
+        # 对冲请求会让单个主机的在途连接数翻倍
+        pool_size = Config.HTTP_POOL_MAXSIZE or self.workers * 2
+
+        if use_pool is None:
+            use_pool = Config.USE_ACCOUNT_POOL
+
+        if self.replaying:
+            # 回放不需要账号，空会话池只用于统计
+            self.pool = SessionPool(self.auth, [], self.headers, pool_size)
+            print(f"📼 回放模式：从存档 {self.archive.archive_file} 读取 {len(self.archive)} 个响应")
+
+        # 多账号模式：加载所有Cookie有效的账号
+        elif use_pool and user_id is None:
+            user_ids = [user['num'] for user in self.auth.read_users()]
+            self.pool = SessionPool(self.auth, user_ids, self.headers, pool_size)
+            if self.pool:
+                print(f"✅ 会话池已加载 {len(self.pool)} 个账号: {self._account_label()}")
+            else:
+                print("⚠️ 没有Cookie有效的账号，改为单账号模式")
 
-        # 如果没有指定user_id，提示用户选择
-        if user_id is None:
-            self.user_id = self._select_user()
+        if not self.pool and not self.replaying:
+            # 如果没有指定user_id，提示用户选择
+            if self.user_id is None:
+                self.user_id = self._select_user()
 
-        # 获取Cookie，如果失败尝试重新登录
-        cookie = self._get_valid_cookie()
-        if not cookie:
-            print("❌ 无法获取有效Cookie，程序退出")
-            sys.exit(1)
+            # 获取Cookie，如果失败尝试重新登录
+            cookie = self._get_valid_cookie()
+            if not cookie:
+                print("❌ 无法获取有效Cookie，程序退出")
+                sys.exit(1)
+
+            self.pool = SessionPool(self.auth, [self.user_id], self.headers, pool_size)
 
-        self.headers['Cookie'] = cookie
-        self.session.headers.update(self.headers)
+        if self.engine_name == 'async':
+            self.engine = AsyncFetchEngine(
+                self.pool, concurrency=self.workers, retry_policy=self.retry_policy, http2=http2
+            )
+        elif self.hedge and not self.replaying:
+            self.hedger = HedgedFetcher(self.pool, self.workers)
 
         # 确保输出目录存在
-        Config.OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
 
     def _select_user(self):
         """选择用户"""
@@ -95,125 +189,302 @@ class NovelDownloader:
             print(f"❌ 重新登录失败: {str(e)}")
             return None
 
-    def get_response(self, url, retry=Config.RETRY_COUNT):
-        """获取网页响应，带重试功能"""
+    def _account_label(self):
+        """当前参与下载的账号编号，用于输出提示"""
+        return ', '.join(str(user_id) for user_id in sorted(self.pool.members)) or str(self.user_id)
+
+    def close(self):
+        """释放下载器持有的网络资源和数据库连接"""
+        if self.engine:
+            self.engine.close()
+            self.engine = None
+        if self.hedger:
+            self.hedger.close()
+        if self.parse_pool:
+            self.parse_pool.close()
+        self.pool.close()
+        if self.archive:
+            self.archive.close()
+        if self.chapter_cache:
+            self.chapter_cache.close()
+        self.progress_mgr.close()
+
+    def get_response(self, url, retry=Config.RETRY_COUNT, headers=None, hedge=False):
+        """获取网页响应，带重试功能
+
+        headers 为本次请求额外附加的请求头；hedge 为真且启用了对冲时，
+        慢请求会再发一个相同的请求，先成功的胜出。同一URL和请求头的
+        并发调用合并为一次网络请求，结果共享给所有调用方
+        """
+        if self.replaying:
+            return self.archive.replay(url)
+        if self.engine:
+            resp = self.engine.get(url, retry, headers, hedge=hedge and self.hedge)
+        else:
+            resp = self.flight.do(request_key(url, headers), self._get_response, url, retry, headers, hedge)
+        if self.archive:
+            self.archive.record(url, resp.status_code, resp.headers, resp.content)
+        return resp
+
+    def _get_response(self, url, retry, headers, hedge):
+        """get_response 的同步引擎实现，同一URL和请求头的并发调用只执行一次"""
+        fetch = self.hedger.get if hedge and self.hedger else self.pool.get
         for attempt in range(retry + 1):
             try:
-                resp = self.session.get(url)
+                resp = fetch(url, headers)
                 resp.raise_for_status()
                 return resp
             except requests.RequestException as e:
                 self.logger.warning(f"第{attempt+1}次请求失败: {url}, 错误: {str(e)}")
+                resp = e.response
+                # 与异步引擎的 httpx.TransportError 对应：连接、超时以及响应体被截断或无法解压都是网络错误
+                if resp is None and not isinstance(e, (
+                    requests.ConnectionError, requests.Timeout,
+                    requests.exceptions.ChunkedEncodingError, requests.exceptions.ContentDecodingError,
+                )):
+                    raise Exception(f"网络请求失败: {str(e)}")
+                if not self.retry_policy.should_retry(
+                    resp.status_code if resp is not None else None, self.pool.account_count()
+                ):
+                    self.logger.error(f"请求失败，错误不可重试: {url}")
+                    raise Exception(f"网络请求失败: {str(e)}")
                 if attempt < retry:
-                    wait_time = Config.RETRY_DELAY * (attempt + 1)
-                    self.logger.info(f"等待{wait_time}秒后重试...")
+                    wait_time = self.retry_policy.delay(
+                        attempt, resp.headers.get('Retry-After') if resp is not None else None
+                    )
+                    self.logger.info(f"等待{wait_time:.1f}秒后重试...")
                     time.sleep(wait_time)
                 else:
                     self.logger.error(f"请求失败，已达到最大重试次数: {url}")
                     raise Exception(f"网络请求失败，已重试{retry}次: {str(e)}")
 
-    def get_novel_info(self, novel_id):
-        """获取小说信息"""
+    def get_novel_info(self, novel_id, refresh=False):
+        """获取小说信息，优先使用未过期的目录缓存，refresh 为真或记录/回放存档时强制重新获取"""
+        if not refresh and not self.archive:
+            novel_info = self.catalog_cache.get(novel_id)
+            if novel_info:
+                self.logger.info(f"使用目录缓存: {novel_info['title']}")
+                return novel_info
+
+        return self.fetch_novel_info(novel_id)
+
+    def fetch_novel_info(self, novel_id, etag=None, last_modified=None):
+        """从网络获取小说信息
+
+        传入 etag / last_modified 时发送条件请求，目录页未变化（304）返回 None
+        """
         self.logger.info(f"获取小说信息: {novel_id}")
         url = f"{Config.BASE_URL}/novel/intro?id={novel_id}"
 
+        headers = {}
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+
         try:
-            soup = BeautifulSoup(self.get_response(url).content, 'html.parser')
-
-            # 提取小说基本信息
-            title = soup.select_one('div.info_box h1').text.strip()
-            author_elem = soup.select_one('.info_box .item a[href*="author"]')
-            author = author_elem.text.strip() if author_elem else "未知作者"
-
-            categories = ' '.join([
-                a.text.strip()
-                for a in soup.select('div.info_box div.item a[href*="category"]')
-            ])
-
-            description = soup.select_one('.brief_box .txt.ellipsis').text.strip()
-
-            tags = ' '.join([
-                a.text.strip()
-                for a in soup.select('.tag_box a[href*="tag"]')
-            ])
-
-            # 获取卷和章节的结构
-            volumes = []
-            volume_elements = soup.select('div.catalog_box li.volume')
-
-            if volume_elements:  # 有卷结构
-                for volume in volume_elements:
-                    volume_title = volume.select_one('span').text.strip()
-                    chapter_links = [
-                        (Config.BASE_URL + a['href'], a.find(string=True, recursive=False).strip())
-                        for a in volume.select('ul.children a[href]')
-                    ]
-                    if chapter_links:
-                        volumes.append((volume_title, chapter_links))
-            else:  # 无卷结构
-                chapter_links = [
-                    (Config.BASE_URL + a['href'], a.find(string=True, recursive=False).strip())
-                    for a in soup.select('div.catalog_box a[href]')
-                ]
-                if chapter_links:
-                    volumes.append(('', chapter_links))
-
-            self.logger.info(f"获取小说信息成功: {title}")
-            return {
+            resp = self.get_response(url, headers=headers)
+            if resp.status_code == 304:
+                self.logger.info(f"小说目录未变化: {novel_id}")
+                return None
+
+            parsed = self.parser.parse_catalog(resp.content, Config.BASE_URL)
+
+            self.logger.info(f"获取小说信息成功: {parsed['title']}")
+            novel_info = {
                 'id': novel_id,
-                'title': title,
-                'author': author,
-                'categories': categories,
-                'description': description,
-                'tags': tags,
-                'volumes': volumes,
-                'total_chapters': sum(len(chapters) for _, chapters in volumes)
+                **parsed,
+                'total_chapters': sum(len(chapters) for _, chapters in parsed['volumes']),
+                'etag': resp.headers.get('ETag'),
+                'last_modified': resp.headers.get('Last-Modified')
             }
+            if not self.replaying:
+                self.catalog_cache.put(novel_id, novel_info)
+            return novel_info
 
         except Exception as e:
             self.logger.exception(f"获取小说信息失败: {str(e)}")
             raise Exception(f"获取小说信息失败: {str(e)}")
 
-    def download_chapter(self, url, chapter_title):
-        """下载单个章节内容"""
+    def _cached_chapter(self, url):
+        """读取章节缓存，未启用缓存或未命中时返回 None"""
+        if not self.chapter_cache:
+            return None
+        return self.chapter_cache.get(url)
+
+    def _extract_chapter(self, url, html, chapter_title):
+        """从章节页面HTML中提取正文，提取成功的正文写入章节缓存"""
+        return self._finish_chapter(url, self.parser.parse_chapter(html), chapter_title)
+
+    def _finish_chapter(self, url, text, chapter_title):
+        """处理解析结果：未找到正文时返回 ChapterHole 占位文本，否则写入章节缓存"""
+        if text is None:
+            self.logger.warning(f"章节内容未找到: {chapter_title}")
+            return ChapterHole.missing(chapter_title)
+
+        if self.chapter_cache:
+            self.chapter_cache.put(url, text)
+        return text
+
+    def get_output_path(self, novel_info):
+        """根据书名和作者生成输出文件路径"""
+        safe_title = re.sub(r'[<>:"/\\|?*]', '_', novel_info['title'])
+        safe_author = re.sub(r'[<>:"/\\|?*]', '_', novel_info['author'])
+        return self.output_dir / f"《{safe_title}》作者：{safe_author}.txt"
+
+    def _build_chapter_tasks(self, volumes, start_chapter, end_chapter):
+        """按目录顺序生成下载任务列表 (章节序号, 卷标题, 章节URL, 章节标题)
+
+        卷标题只挂在卷首章节上，其余章节为空字符串
+        """
+        tasks = []
+        chapter_num = 0
+        for volume_title, chapters in volumes:
+            for i, (url, chapter_title) in enumerate(chapters):
+                chapter_num += 1
+                if chapter_num < start_chapter:
+                    continue
+                if chapter_num > end_chapter:
+                    return tasks
+                header = volume_title if i == 0 else ''
+                tasks.append((chapter_num, header, url, chapter_title))
+        return tasks
+
+    def _fetch_chapter(self, task):
+        """抓取阶段（线程池）：获取单个章节页面的原始内容"""
+        _, _, url, chapter_title = task
         self.logger.info(f"下载章节: {chapter_title}")
+        return self.get_response(url, hedge=True).content
+
+    async def _fetch_chapter_async(self, task):
+        """抓取阶段（异步引擎）：获取单个章节页面的原始内容"""
+        _, _, url, chapter_title = task
+        self.logger.info(f"下载章节: {chapter_title}")
+        resp = await self.engine.fetch(url, hedge=self.hedge)
+        if self.archive:
+            self.archive.record(url, resp.status_code, resp.headers, resp.content)
+        return resp.content
+
+    def _parse_chapter(self, task, fetched):
+        """解析阶段：从抓取结果中提取正文，抓取失败时返回占位文本"""
+        _, _, url, chapter_title = task
         try:
-            soup = BeautifulSoup(self.get_response(url).content, 'html.parser')
-            content = soup.select_one('div.article')
+            return self._extract_chapter(url, fetched.result(), chapter_title)
+        except Exception as e:
+            self.logger.exception(f"下载章节失败: {chapter_title}, 错误: {str(e)}")
+            return ChapterHole.failed(e)
 
-            if not content:
-                self.logger.warning(f"章节内容未找到: {chapter_title}")
-                return f"[章节内容未找到: {chapter_title}]"
+    def _finish_parse_job(self, task, job):
+        """解析进程返回后，在回调线程中整理正文"""
+        _, _, url, chapter_title = task
+        try:
+            return self._finish_chapter(url, job.result(), chapter_title)
+        except Exception as e:
+            self.logger.exception(f"解析章节失败: {chapter_title}, 错误: {str(e)}")
+            return ChapterHole.failed(e)
 
-            text = '\n'.join(
-                p.find(string=True, recursive=False).strip()
-                for p in content.select('div.line')
-                if p.find(string=True, recursive=False) and p.find(string=True, recursive=False).strip()
-            )
+    def _then_parse(self, task, fetched, parse_executor):
+        """抓取完成后把页面交给解析进程池或解析线程池，返回最终正文的 Future"""
+        parsed = Future()
 
-            return text
-        except Exception as e:
-            self.logger.exception(f"下载章节失败: {chapter_title}, 错误: {str(e)}")
-            return f"[下载失败: {str(e)}]"
-
-    def _get_volume_info(self, chapter_num, volumes):
-        """确定章节所在卷及是否为卷首章节"""
-        total = 0
-        for vol_index, (_, chapters) in enumerate(volumes):
-            total += len(chapters)
-            if chapter_num <= total:
-                # 计算章节在当前卷中的位置
-                chapter_in_volume = chapter_num - (total - len(chapters))
-                return vol_index, chapter_in_volume == 1
-        return len(volumes) - 1, False
-
-    def download_novel(self, novel_id, start_chapter=1, end_chapter=None):
-        """下载小说，可以指定起始章节和终止章节"""
+        def on_parsed(future):
+            if future.cancelled():
+                parsed.set_result(ChapterHole.failed("下载已停止"))
+            else:
+                parsed.set_result(future.result())
+
+        def on_fetched(future):
+            # 写入端已放弃该章节（下载停止）时不再解析
+            if future.cancelled():
+                parsed.cancel()
+                return
+            if not parsed.set_running_or_notify_cancel():
+                return
+            try:
+                if self.parse_pool and future.exception() is None:
+                    # 只有页面 bytes 和正文字符串跨进程传递
+                    job = self.parse_pool.submit(future.result())
+                    job.add_done_callback(lambda job: parsed.set_result(self._finish_parse_job(task, job)))
+                else:
+                    parse_executor.submit(self._parse_chapter, task, future).add_done_callback(on_parsed)
+            except RuntimeError:
+                # 解析线程池已关闭
+                parsed.set_result(ChapterHole.failed("下载已停止"))
+
+        def on_cancelled(future):
+            if future.cancelled():
+                fetched.cancel()
+
+        parsed.add_done_callback(on_cancelled)
+        fetched.add_done_callback(on_fetched)
+        return parsed
+
+    def iter_chapter_contents(self, tasks):
+        """流水线下载章节，按目录顺序逐个产出 (task, content)
+
+        抓取（线程池或异步引擎）→ 解析（解析线程池或进程池）→ 写入（调用方）三个阶段
+        同时进行：页面抓取完成后立即交给解析线程池，写入端按目录顺序取用。
+        有序窗口（重排缓冲区）限制了已提交但尚未写入的章节数，写入端跟不上时
+        抓取和解析自动暂停，内存占用与书的章节数无关。
+
+        tasks 为 (章节序号, 卷标题, 章节URL, 章节标题) 序列，content 为正文或
+        ChapterHole 占位文本；download_novel、sync 和 repair 共用这条流水线。
+        提前停止读取时调用方需关闭生成器（close()），取消未完成的请求。
+        """
+        parse_workers = max(1, Config.PARSE_WORKERS)
+        parallelism = self.parse_pool.processes if self.parse_pool else parse_workers
+        window = Config.PIPELINE_WINDOW or self.workers * 2 + parallelism
+        task_iter = iter(tasks)
+        pending = deque()
+        shared = self.executor is not None
+        executor = self.executor
+        if not self.engine and not shared:
+            executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='chapter')
+        parse_executor = ThreadPoolExecutor(max_workers=parse_workers, thread_name_prefix='parse')
+
+        def submit(task):
+            # 缓存命中时直接使用正文，跳过抓取和解析
+            cached = self._cached_chapter(task[2])
+            if cached is not None:
+                self.logger.info(f"从缓存读取章节: {task[3]}")
+                future = Future()
+                future.set_result(cached)
+            elif self.engine:
+                future = self._then_parse(task, self.engine.submit(self._fetch_chapter_async(task)), parse_executor)
+            else:
+                future = self._then_parse(task, executor.submit(self._fetch_chapter, task), parse_executor)
+            pending.append((task, future))
+
+        try:
+            for task in islice(task_iter, window):
+                submit(task)
+
+            while pending:
+                task, future = pending[0]
+                content = future.result()
+                pending.popleft()
+
+                next_task = next(task_iter, None)
+                if next_task:
+                    submit(next_task)
+
+                yield task, content
+        finally:
+            for _, future in pending:
+                future.cancel()
+            if executor and not shared:
+                executor.shutdown(wait=False)
+            parse_executor.shutdown(wait=False)
+
+    def download_novel(self, novel_id, start_chapter=1, end_chapter=None, refresh=False):
+        """下载小说，可以指定起始章节和终止章节；refresh 为真时忽略目录缓存
+
+        下载完成返回 True；被 Ctrl+C 或 stop_event 中断时保存进度后返回 False
+        """
         try:
             # 获取小说信息
-            novel_info = self.get_novel_info(novel_id)
+            novel_info = self.get_novel_info(novel_id, refresh=refresh)
             title = novel_info['title']
-            author = novel_info['author']
             volumes = novel_info['volumes']
             total_chapters = novel_info['total_chapters']
 
@@ -227,24 +498,30 @@ class NovelDownloader:
             if start_chapter > end_chapter:
                 raise ValueError("起始章节不能大于结束章节")
 
-            # 创建文件名
-            safe_title = re.sub(r'[<>:"/\\|?*]', '_', title)
-            safe_author = re.sub(r'[<>:"/\\|?*]', '_', author)
-            output_filename = f"《{safe_title}》作者：{safe_author}.txt"
-            output_path = Config.OUTPUT_DIR / output_filename
+            output_path = self.get_output_path(novel_info)
 
             print(f"\n📚 开始下载《{title}》")
             print(f"📝 作者：{novel_info['author']}")
             print(f"🏷️ 题材：{novel_info['categories']}")
             print(f"📊 下载范围：第{start_chapter}章 至 第{end_chapter}章（共{end_chapter-start_chapter+1}章）")
+            print(f"⚙️ 下载引擎：{self.engine_name}，并发数：{self.workers}")
             print("💡 按 Ctrl+C 可随时停止下载")
 
-            # 计算要跳过的章节数
-            chapters_to_skip = start_chapter - 1
-            current_chapter = 1
+            started = time.monotonic()
+            tasks = self._build_chapter_tasks(volumes, start_chapter, end_chapter)
+            # 下一个尚未写入文件的章节
+            next_chapter = start_chapter
 
-            # 选择写入模式
-            file_mode = 'w' if start_chapter == 1 else 'a'
+            # 选择写入模式，续传时先按检查点截断文件
+            if start_chapter == 1:
+                file_mode = 'w'
+                offsets = {}
+            else:
+                file_mode = 'a'
+                offsets = self._restore_checkpoint(novel_id, output_path, start_chapter)
+            # 这部分文件内容将被重写，原有的待修复记录随之失效
+            self.progress_mgr.clear_holes(novel_id, start_chapter)
+            holes = {'failed': 0, 'missing': 0}
 
             try:
                 with open(output_path, file_mode, encoding='utf-8') as f:
@@ -253,75 +530,144 @@ class NovelDownloader:
                         f.write(f"{title}\n作者：{novel_info['author']}\n题材：{novel_info['categories']}\n")
                         f.write(f"标签：{novel_info['tags']}\n\n{novel_info['description']}\n\n\n")
 
-                    for volume_title, chapters in volumes:
-                        if chapters_to_skip >= len(chapters):
-                            chapters_to_skip -= len(chapters)
-                            current_chapter += len(chapters)
-                            continue
+                    self.progress_mgr.update_progress(
+                        novel_id, title, start_chapter, total_chapters,
+                        checkpoint={'output_file': output_path, 'offsets': offsets}
+                    )
 
-                        # 只在有卷标题时才进行卷标题的输出判断
-                        if volume_title:
-                            _, is_first_chapter = self._get_volume_info(current_chapter + chapters_to_skip, volumes)
-                            if (current_chapter == 1 and start_chapter == 1) or is_first_chapter:
+                    chapter_contents = self.iter_chapter_contents(tasks)
+                    try:
+                        for (chapter_num, volume_title, url, chapter_title), content in chapter_contents:
+                            if self.stop_event.is_set():
+                                # 与 Ctrl+C 走同一条保存进度的路径
+                                raise KeyboardInterrupt
+                            if volume_title:
                                 f.write(f"\n{volume_title}\n\n")
 
-                        for i, (url, chapter_title) in enumerate(chapters):
-                            if chapters_to_skip > 0:
-                                chapters_to_skip -= 1
-                                current_chapter += 1
-                                continue
-
-                            if current_chapter > end_chapter:
-                                break
-
-                            # 下载章节内容
-                            content = self.download_chapter(url, chapter_title)
                             if content:
                                 f.write(f"\n{chapter_title}\n\n{content}\n\n")
-                                print(f"✅ [{current_chapter}/{end_chapter}] {chapter_title}")
 
-                                # 更新进度
-                                self.progress_mgr.update_progress(
-                                    novel_id, title, current_chapter + 1, total_chapters
+                            # 确保内容落盘后再记录检查点
+                            f.flush()
+                            self.progress_mgr.record_chapter(
+                                novel_id, title, chapter_num, f.tell(), total_chapters
+                            )
+                            if isinstance(content, ChapterHole):
+                                # 占位文本留在文件中，由 repair 命令重新下载后替换
+                                self.progress_mgr.record_hole(
+                                    novel_id, chapter_num, url, chapter_title,
+                                    content.kind, str(content), output_path, content.error
                                 )
+                                holes[content.kind] += 1
+                                print(f"❌ [{chapter_num}/{end_chapter}] {chapter_title} {content}")
+                            elif content:
+                                print(f"✅ [{chapter_num}/{end_chapter}] {chapter_title}")
 
-                                # 如果还有更多章节要下载，则等待一段时间
-                                if current_chapter < end_chapter:
-                                    time.sleep(Config.CHAPTER_DELAY)
-
-                            current_chapter += 1
-
-                        if current_chapter > end_chapter:
-                            break
+                            next_chapter = chapter_num + 1
+                    finally:
+                        chapter_contents.close()
 
             except KeyboardInterrupt:
                 print(f"\n\n⚠️ 检测到 Ctrl+C，正在停止下载...")
+                self.snapshots.record_download(novel_info, output_path, start_chapter, next_chapter - 1)
+                self.report_holes(novel_id, holes)
                 # 保存当前进度
-                if current_chapter <= total_chapters:
+                if next_chapter <= total_chapters:
                     self.progress_mgr.update_progress(
-                        novel_id, title, current_chapter, total_chapters
+                        novel_id, title, next_chapter, total_chapters
                     )
                     print(f"📄 已下载内容保存在: {output_path}")
                     print("💡 下次可以选择从当前位置继续下载")
                 print("👋 下载已停止")
-                return
+                return False
+
+            self.snapshots.record_download(novel_info, output_path, start_chapter, end_chapter)
 
             print(f"\n✅ 下载完成！")
             print(f"📄 文件保存在: {output_path}")
-            print(f"👤 当前使用账号ID: {self.user_id}")
+            print(f"⏱️ 用时 {time.monotonic() - started:.1f} 秒（{len(tasks)} 章）")
+            print(f"👤 当前使用账号ID: {self._account_label()}")
+            self.report_holes(novel_id, holes)
+            self._report_rate()
 
             # 如果下载完所有章节，清除进度
             # if end_chapter == total_chapters:
             #     self.progress_mgr.clear_progress(novel_id)
+            return True
 
         except KeyboardInterrupt:
             print(f"\n\n⚠️ 检测到 Ctrl+C，下载已取消")
             print("👋 程序退出")
-            return
+            return False
         except Exception as e:
             self.logger.exception(f"下载小说失败: {str(e)}")
             raise Exception(f"下载失败: {str(e)}")
 
+    def _restore_checkpoint(self, novel_id, output_path, start_chapter):
+        """续传前把输出文件截断到第 start_chapter-1 章的结束位置
+
+        返回保留下来的章节偏移 {章节序号: 结束偏移}；没有可用检查点时返回
+        空字典，按原方式追加写入
+        """
+        checkpoint = self.progress_mgr.get_checkpoint(novel_id)
+        if not checkpoint or checkpoint['output_file'] != str(output_path) or not output_path.exists():
+            return {}
+
+        offset = checkpoint['offsets'].get(start_chapter - 1)
+        size = output_path.stat().st_size
+        if offset is None or offset > size:
+            self.logger.warning(f"检查点与输出文件不一致，按追加方式续传: {output_path}")
+            return {}
+
+        if size > offset:
+            # 截掉最后一致位置之后写了一半或重复的内容
+            with open(output_path, 'r+b') as f:
+                f.truncate(offset)
+            self.logger.info(f"按检查点截断输出文件: {size} -> {offset} 字节")
+            print(f"✂️ 已移除第{start_chapter - 1}章之后未确认的 {size - offset} 字节内容")
+
+        return {num: end for num, end in checkpoint['offsets'].items() if num < start_chapter}
+
+    def report_holes(self, novel_id, holes):
+        """提示本次写入了占位文本的章节数和修复方法"""
+        if holes['failed']:
+            print(f"⚠️ {holes['failed']} 个章节下载失败，可运行 python main.py repair {novel_id} 重新下载")
+        if holes['missing']:
+            print(f"⚠️ {holes['missing']} 个章节未找到正文，可运行 python main.py repair {novel_id} --missing 重试")
+
+    def _report_rate(self):
+        """输出限速器最终稳定的请求速率，便于调整限速参数"""
+        for user_id, rates in self.pool.rates().items():
+            for host, rate in rates.items():
+                self.logger.info(f"账号 {user_id} 对主机 {host} 的最终请求速率: {rate:.2f} 次/秒")
+                print(f"📈 账号 {user_id} @ {host} 最终请求速率：{rate:.2f} 次/秒")
+
+        if self.hedger:
+            issued, won = self.hedger.issued, self.hedger.won
+        elif self.engine:
+            issued, won = self.engine.hedges_issued, self.engine.hedges_won
+        else:
+            issued = won = 0
+        if issued:
+            self.logger.info(f"对冲请求 {issued} 次，其中 {won} 次先于原请求完成")
+            print(f"🔀 对冲请求 {issued} 次，其中 {won} 次先于原请求完成")
+
+        flight = self.engine.flight if self.engine else self.flight
+        if flight.shared:
+            self.logger.info(f"共 {flight.calls} 次请求，其中 {flight.shared} 次与进行中的相同请求合并")
+            print(f"🔗 合并重复请求 {flight.shared} 次（共 {flight.calls} 次请求）")
+
+        if self.archive and self.archive.recorded:
+            print(f"📼 已记录 {self.archive.recorded} 个响应到 {self.archive.archive_file}")
+        elif self.archive and self.archive.replayed:
+            print(f"📼 从存档回放 {self.archive.replayed} 个响应")
+
+        wire, decoded = self.pool.wire_bytes, self.pool.decoded_bytes
+        if decoded:
+            saved = (1 - wire / decoded) * 100
+            self.logger.info(f"响应体传输 {wire} 字节，解压后 {decoded} 字节，压缩节省 {saved:.1f}%")
+            print(f"📦 传输 {wire / 1024 / 1024:.2f}MB，解压后 {decoded / 1024 / 1024:.2f}MB（节省 {saved:.1f}%）")
+
     def interactive_download(self):
         """交互式下载小说"""
         try:
@@ -329,7 +675,7 @@ class NovelDownloader:
             print("\n" + "=" * width)
             print("\033[92m" + "📚 小说下载工具".center(width) + "\033[0m")
             print("=" * width)
-            print(f"👤 当前使用账号ID: {self.user_id}")
+            print(f"👤 当前使用账号ID: {self._account_label()}")
 
             try:
                 # 输入小说ID
@@ -0,0 +1,129 @@
+import math
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from urllib.parse import urlparse
+from .config import Config
+from .logger import setup_logger
+
+class LatencyHistogram:
+    """响应耗时直方图
+
+    桶边界按 GROWTH 倍数递增（对数分桶），内存固定，分位数的
+    相对误差不超过一个桶的宽度。
+    """
+
+    MIN_LATENCY = 0.01  # 第一个桶的上界（秒）
+    GROWTH = 1.2  # 相邻桶上界的倍数
+    BUCKETS = 60  # 覆盖约 0.01 秒到 500 秒
+
+    def __init__(self):
+        self.counts = [0] * self.BUCKETS
+        self.total = 0
+
+    def record(self, latency):
+        """记录一次耗时（秒）"""
+        if latency <= self.MIN_LATENCY:
+            index = 0
+        else:
+            index = min(self.BUCKETS - 1, math.ceil(math.log(latency / self.MIN_LATENCY, self.GROWTH)))
+        self.counts[index] += 1
+        self.total += 1
+
+    def quantile(self, q):
+        """返回 q 分位的耗时（所在桶的上界），没有样本返回 None"""
+        if not self.total:
+            return None
+        rank = q * self.total
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return self.MIN_LATENCY * self.GROWTH ** index
+        return self.MIN_LATENCY * self.GROWTH ** (self.BUCKETS - 1)
+
+class LatencyTracker:
+    """按主机统计响应耗时，并据此给出对冲请求的触发阈值"""
+
+    def __init__(self):
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def record(self, url, latency):
+        """记录一次请求耗时"""
+        host = urlparse(url).netloc
+        with self._lock:
+            histogram = self._histograms.get(host)
+            if histogram is None:
+                histogram = self._histograms[host] = LatencyHistogram()
+            histogram.record(latency)
+
+    def quantile(self, url, q):
+        """返回该主机耗时的 q 分位，没有样本返回 None"""
+        with self._lock:
+            histogram = self._histograms.get(urlparse(url).netloc)
+            return histogram.quantile(q) if histogram else None
+
+    def hedge_delay(self, url):
+        """请求发出多久仍未完成时发送对冲请求，样本不足时返回 None（不对冲）"""
+        with self._lock:
+            histogram = self._histograms.get(urlparse(url).netloc)
+            if not histogram or histogram.total < Config.HEDGE_MIN_SAMPLES:
+                return None
+            return max(Config.HEDGE_MIN_DELAY, histogram.quantile(Config.HEDGE_QUANTILE))
+
+class HedgedFetcher:
+    """对冲请求
+
+    请求发出后（不含等待限速令牌的时间）超过该主机历史耗时的 HEDGE_QUANTILE
+    分位（默认 p95）仍未完成时，
+    通过会话池再发一个相同的请求（可能分配给另一个账号），先成功返回的
+    响应胜出。落后的请求无法中断，会在后台线程中完成并照常计入限速统计。
+    """
+
+    def __init__(self, pool, workers):
+        """初始化对冲请求，workers 为章节并发数，决定后台线程数"""
+        self.logger = setup_logger('hedge')
+        self.pool = pool
+        self.issued = 0  # 发出的对冲请求数
+        self.won = 0  # 对冲请求先于原请求完成的次数
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers * 2, thread_name_prefix='hedge')
+
+    @staticmethod
+    def _succeeded(future):
+        """请求是否得到了可用的响应"""
+        return future.exception() is None and future.result().status_code < 500
+
+    def get(self, url, headers=None):
+        """发送 GET 请求，超过阈值时对冲，返回最先成功的响应"""
+        delay = self.pool.latency.hedge_delay(url)
+        if delay is None:
+            return self.pool.get(url, headers)
+
+        # 先在当前线程等到限速令牌，对冲计时只包含网络请求本身的耗时
+        member = self.pool.reserve(url)
+        primary = self._executor.submit(self.pool.send, member, url, headers)
+        done, _ = wait([primary], timeout=delay)
+        if done:
+            return primary.result()
+
+        self.logger.info(f"请求超过 {delay:.2f} 秒未完成，发送对冲请求: {url}")
+        hedge = self._executor.submit(self.pool.get, url, headers)
+        with self._lock:
+            self.issued += 1
+
+        pending = {primary, hedge}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if self._succeeded(future):
+                    if future is hedge:
+                        with self._lock:
+                            self.won += 1
+                    return future.result()
+        # 两个请求都失败时以原请求的结果为准，交给调用方重试
+        return primary.result()
+
+    def close(self):
+        """停止后台线程，不等待落后的请求"""
+        self._executor.shutdown(wait=False)
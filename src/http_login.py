@@ -0,0 +1,87 @@
+from urllib.parse import urljoin
+import requests
+from bs4 import BeautifulSoup
+from .config import Config
+from .logger import setup_logger
+
+class LoginRequiresBrowser(Exception):
+    """登录页面依赖 JS 渲染，无法只用 HTTP 请求完成登录"""
+
+class HttpLogin:
+    """不启动浏览器的登录方式
+
+    用普通 HTTP 请求完成登录：读取首页中的登录表单，直接下载验证码图片交给
+    CaptchaSolver 识别，再提交表单，得到 token Cookie 即为成功。页面中没有
+    可直接提交的登录表单（由 JS 生成）时抛出 LoginRequiresBrowser，由调用方
+    改用浏览器登录。base_url 可以指向本地的模拟登录服务用于测试。
+    """
+
+    MAX_CAPTCHA_ATTEMPTS = 3
+    # 不随表单提交的 input 类型
+    SKIPPED_INPUT_TYPES = {'submit', 'button', 'image', 'reset', 'file'}
+
+    def __init__(self, captcha_solver, base_url=None, headers=None):
+        """初始化 HTTP 登录
+
+        Args:
+            captcha_solver: CaptchaSolver 实例，使用其 solve_image 识别验证码
+            base_url: 登录页面地址，默认 Config.BASE_URL
+            headers: 请求头，默认只带 User-Agent
+        """
+        self.logger = setup_logger('auth')
+        self.captcha_solver = captcha_solver
+        self.base_url = base_url or Config.BASE_URL
+        self.headers = headers or {'User-Agent': Config.USER_AGENT}
+        self.timeout = (Config.CONNECT_TIMEOUT, Config.READ_TIMEOUT)
+
+    def _find_form(self, html, page_url):
+        """从页面中找出登录表单，返回 (提交地址, 提交方法, 表单字段, 验证码图片地址)"""
+        soup = BeautifulSoup(html, 'html.parser')
+        name_input = soup.find('input', attrs={'name': 'login_name'})
+        form = name_input.find_parent('form') if name_input else None
+        captcha = soup.find('img', id='login_captche_img')
+        if form is None or captcha is None or not captcha.get('src'):
+            raise LoginRequiresBrowser("页面中没有可直接提交的登录表单")
+
+        fields = {
+            field['name']: field.get('value', '')
+            for field in form.find_all('input')
+            if field.get('name') and field.get('type', 'text').lower() not in self.SKIPPED_INPUT_TYPES
+        }
+        action = urljoin(page_url, form.get('action') or page_url)
+        method = (form.get('method') or 'post').lower()
+        return action, method, fields, urljoin(page_url, captcha['src'])
+
+    def login(self, email, password):
+        """登录并返回 (Cookie 字符串, token Cookie)，token 为 http.cookiejar.Cookie"""
+        with requests.Session() as session:
+            session.headers.update(self.headers)
+            page = session.get(self.base_url, timeout=self.timeout)
+            page.raise_for_status()
+            action, method, fields, captcha_url = self._find_form(page.content, page.url)
+            fields.update(login_name=email, login_password=password)
+            referer = {'Referer': page.url}
+
+            for attempt in range(self.MAX_CAPTCHA_ATTEMPTS):
+                # 验证码与会话绑定，必须用同一个 Session 下载
+                image = session.get(captcha_url, headers=referer, timeout=self.timeout)
+                image.raise_for_status()
+                fields['check_code'] = self.captcha_solver.solve_image(image.content)
+                print(f"🤖 验证码识别结果: {fields['check_code']}")
+
+                if method == 'get':
+                    resp = session.get(action, params=fields, headers=referer, timeout=self.timeout)
+                else:
+                    resp = session.post(action, data=fields, headers=referer, timeout=self.timeout)
+                resp.raise_for_status()
+
+                token = next((cookie for cookie in session.cookies if cookie.name == 'token'), None)
+                if token:
+                    self.logger.info(f"HTTP登录成功: {email}")
+                    cookie_string = '; '.join(f"{cookie.name}={cookie.value}" for cookie in session.cookies)
+                    return cookie_string, token
+
+                if attempt < self.MAX_CAPTCHA_ATTEMPTS - 1:
+                    print(f"❌ 验证码可能错误，正在重试 ({attempt + 1}/{self.MAX_CAPTCHA_ATTEMPTS})...")
+
+            raise Exception("验证码识别失败次数过多")
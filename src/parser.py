@@ -0,0 +1,256 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from bs4 import BeautifulSoup, SoupStrainer, UnicodeDammit
+from .config import Config
+from .logger import setup_logger
+
+try:
+    import lxml.html
+except ImportError:  # lxml 不可用时回退到 html.parser
+    lxml = None
+
+def _class_matcher(*names):
+    """SoupStrainer 的 class 匹配函数，支持 class="article x" 这样的多值属性"""
+    names = set(names)
+
+    def match(value):
+        if not value:
+            return False
+        return not names.isdisjoint(value.split() if isinstance(value, str) else value)
+    return match
+
+class SoupParser:
+    """基于 BeautifulSoup + html.parser 的解析器
+
+    使用 SoupStrainer 只构建目录相关区块和 div.article 的节点树。
+    """
+
+    name = 'html.parser'
+
+    # 目录页只需要这几个区块
+    CATALOG_STRAINER = SoupStrainer(class_=_class_matcher('info_box', 'brief_box', 'tag_box', 'catalog_box'))
+    CHAPTER_STRAINER = SoupStrainer('div', class_=_class_matcher('article'))
+
+    def parse_catalog(self, html, base_url):
+        """解析目录页，返回小说基本信息和卷章结构"""
+        soup = BeautifulSoup(html, 'html.parser', parse_only=self.CATALOG_STRAINER)
+
+        title = soup.select_one('div.info_box h1').text.strip()
+        author_elem = soup.select_one('.info_box .item a[href*="author"]')
+        author = author_elem.text.strip() if author_elem else "未知作者"
+
+        categories = ' '.join([
+            a.text.strip()
+            for a in soup.select('div.info_box div.item a[href*="category"]')
+        ])
+
+        description = soup.select_one('.brief_box .txt.ellipsis').text.strip()
+
+        tags = ' '.join([
+            a.text.strip()
+            for a in soup.select('.tag_box a[href*="tag"]')
+        ])
+
+        # 获取卷和章节的结构
+        volumes = []
+        volume_elements = soup.select('div.catalog_box li.volume')
+
+        if volume_elements:  # 有卷结构
+            for volume in volume_elements:
+                volume_title = volume.select_one('span').text.strip()
+                chapter_links = [
+                    (base_url + a['href'], a.find(string=True, recursive=False).strip())
+                    for a in volume.select('ul.children a[href]')
+                ]
+                if chapter_links:
+                    volumes.append((volume_title, chapter_links))
+        else:  # 无卷结构
+            chapter_links = [
+                (base_url + a['href'], a.find(string=True, recursive=False).strip())
+                for a in soup.select('div.catalog_box a[href]')
+            ]
+            if chapter_links:
+                volumes.append(('', chapter_links))
+
+        return {
+            'title': title,
+            'author': author,
+            'categories': categories,
+            'description': description,
+            'tags': tags,
+            'volumes': volumes
+        }
+
+    def parse_chapter(self, html):
+        """提取章节正文，页面中没有 div.article 时返回 None"""
+        soup = BeautifulSoup(html, 'html.parser', parse_only=self.CHAPTER_STRAINER)
+        content = soup.select_one('div.article')
+        if not content:
+            return None
+
+        lines = []
+        for p in content.select('div.line'):
+            string = p.find(string=True, recursive=False)
+            if string and string.strip():
+                lines.append(string.strip())
+        return '\n'.join(lines)
+
+def _has_class(name):
+    """XPath 条件：元素的 class 属性包含 name"""
+    return f'contains(concat(" ", normalize-space(@class), " "), " {name} ")'
+
+class LxmlParser:
+    """基于 lxml (libxml2) 的解析器
+
+    用预编译的 XPath 复现 SoupParser 的选择器，提取结果与之一致，
+    解析耗时只有 html.parser 的几分之一。
+    """
+
+    name = 'lxml'
+
+    def __init__(self):
+        xpath = lxml.html.etree.XPath
+        info_box = f'//div[{_has_class("info_box")}]'
+        catalog_box = f'//div[{_has_class("catalog_box")}]'
+
+        self._title = xpath(f'{info_box}//h1')
+        self._author = xpath(f'//*[{_has_class("info_box")}]//*[{_has_class("item")}]//a[contains(@href, "author")]')
+        self._categories = xpath(f'{info_box}//div[{_has_class("item")}]//a[contains(@href, "category")]')
+        self._description = xpath(
+            f'//*[{_has_class("brief_box")}]//*[{_has_class("txt")} and {_has_class("ellipsis")}]'
+        )
+        self._tags = xpath(f'//*[{_has_class("tag_box")}]//a[contains(@href, "tag")]')
+        self._volumes = xpath(f'{catalog_box}//li[{_has_class("volume")}]')
+        self._volume_title = xpath('.//span')
+        self._volume_links = xpath(f'.//ul[{_has_class("children")}]//a[@href]')
+        self._links = xpath(f'{catalog_box}//a[@href]')
+        self._article = xpath(f'//div[{_has_class("article")}]')
+        self._lines = xpath(f'.//div[{_has_class("line")}]')
+        # BeautifulSoup 的 find(string=True, recursive=False) 也会命中注释节点
+        self._first_string = xpath('(text() | comment())[1]')
+
+    def _document(self, html):
+        """解码方式与 BeautifulSoup 相同（UnicodeDammit），保证两种后端读到同样的文本"""
+        if isinstance(html, bytes):
+            html = UnicodeDammit(html, is_html=True).unicode_markup
+        return lxml.html.document_fromstring(html)
+
+    def _first_text(self, element):
+        """元素的第一个直接文本节点，没有时返回 None"""
+        strings = self._first_string(element)
+        if not strings:
+            return None
+        string = strings[0]
+        return string if isinstance(string, str) else (string.text or '')
+
+    def _link(self, a, base_url):
+        """(章节URL, 章节标题)，标题取 a 的第一个直接文本节点"""
+        return base_url + a.get('href'), self._first_text(a).strip()
+
+    def parse_catalog(self, html, base_url):
+        """解析目录页，返回小说基本信息和卷章结构"""
+        doc = self._document(html)
+
+        title = self._title(doc)[0].text_content().strip()
+        author_elems = self._author(doc)
+        author = author_elems[0].text_content().strip() if author_elems else "未知作者"
+        categories = ' '.join(a.text_content().strip() for a in self._categories(doc))
+        description = self._description(doc)[0].text_content().strip()
+        tags = ' '.join(a.text_content().strip() for a in self._tags(doc))
+
+        volumes = []
+        volume_elements = self._volumes(doc)
+
+        if volume_elements:  # 有卷结构
+            for volume in volume_elements:
+                volume_title = self._volume_title(volume)[0].text_content().strip()
+                chapter_links = [self._link(a, base_url) for a in self._volume_links(volume)]
+                if chapter_links:
+                    volumes.append((volume_title, chapter_links))
+        else:  # 无卷结构
+            chapter_links = [self._link(a, base_url) for a in self._links(doc)]
+            if chapter_links:
+                volumes.append(('', chapter_links))
+
+        return {
+            'title': title,
+            'author': author,
+            'categories': categories,
+            'description': description,
+            'tags': tags,
+            'volumes': volumes
+        }
+
+    def parse_chapter(self, html):
+        """提取章节正文，页面中没有 div.article 时返回 None"""
+        articles = self._article(self._document(html))
+        if not articles:
+            return None
+
+        lines = []
+        for p in self._lines(articles[0]):
+            string = self._first_text(p)
+            if string and string.strip():
+                lines.append(string.strip())
+        return '\n'.join(lines)
+
+PARSERS = {
+    'html.parser': SoupParser,
+    'lxml': LxmlParser
+}
+
+def get_parser(name=None):
+    """按名称创建解析器，auto 优先使用 lxml，未安装时回退到 html.parser"""
+    logger = setup_logger('parser')
+    name = name or Config.PARSER_BACKEND
+
+    if name == 'auto':
+        name = 'lxml' if lxml else 'html.parser'
+    if name not in PARSERS:
+        raise Exception(f"不支持的解析器: {name}，可选: auto, {', '.join(PARSERS)}")
+    if name == 'lxml' and not lxml:
+        logger.warning("未安装 lxml，回退到 html.parser 解析器")
+        name = 'html.parser'
+
+    logger.info(f"使用解析器: {name}")
+    return PARSERS[name]()
+
+# 解析子进程中的解析器实例，由 _init_worker 创建
+_worker_parser = None
+
+def _init_worker(name):
+    """解析子进程初始化：创建一次解析器，供该进程处理的所有章节复用"""
+    global _worker_parser
+    _worker_parser = PARSERS[name]()
+
+def _parse_chapter_in_worker(html):
+    """在解析子进程中提取章节正文，参数和返回值只有 bytes / str"""
+    return _worker_parser.parse_chapter(html)
+
+class ProcessParsePool:
+    """章节解析进程池
+
+    把章节页面的原始 bytes 交给子进程解析，返回正文字符串（或 None），
+    绕开 GIL 让解析吞吐随 CPU 核数增长。子进程在下载器的整个生命周期内
+    复用，批量下载多部小说时也不会重复启动。
+    """
+
+    def __init__(self, parser_name, processes):
+        """初始化进程池，parser_name 为子进程使用的解析器名称"""
+        self.logger = setup_logger('parser')
+        self.processes = processes
+        # 下载器此时已有多个线程（连接池、限速器等），在 Linux 上 fork 会把其他线程
+        # 持有的锁一并复制到子进程里，可能导致子进程死锁，因此用 spawn 启动干净的子进程
+        self._executor = ProcessPoolExecutor(
+            max_workers=processes, initializer=_init_worker, initargs=(parser_name,),
+            mp_context=multiprocessing.get_context('spawn'),
+        )
+        self.logger.info(f"使用 {processes} 个子进程解析章节 ({parser_name})")
+
+    def submit(self, html):
+        """提交章节页面，返回正文的 concurrent.futures.Future"""
+        return self._executor.submit(_parse_chapter_in_worker, html)
+
+    def close(self):
+        """关闭进程池，丢弃尚未开始的解析任务"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
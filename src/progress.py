@@ -1,73 +1,302 @@
 import json
+import sqlite3
+import threading
+import time
 from pathlib import Path
 from .config import Config
 from .logger import setup_logger
 
 class ProgressManager:
-    """下载进度管理类"""
-
-    def __init__(self):
+    """下载进度管理类
+
+    进度保存在 DATA_DIR 下的 SQLite 数据库（WAL 模式）中，每个章节只更新
+    对应的一行，多个下载进程可以同时写入。旧版的 progress.json 会在首次
+    打开时自动迁移。
+    """
+
+    # view_progress 支持的排序方式
+    SORT_ORDERS = {
+        'updated': 'updated DESC',
+        'title': 'title COLLATE NOCASE, novel_id',
+        'percentage': 'CAST(next_chapter - 1 AS REAL) / MAX(total_chapters, 1) DESC, updated DESC',
+        'id': 'novel_id'
+    }
+
+    def __init__(self, db_file=None):
         """初始化进度管理器"""
         self.logger = setup_logger('progress')
+        self.db_file = db_file or Config.PROGRESS_DB_FILE
         self.progress_file = Config.PROGRESS_FILE
+        self._lock = threading.Lock()
 
         # 确保数据目录存在
         Config.DATA_DIR.mkdir(parents=True, exist_ok=True)
 
-        # 确保进度文件存在
+        self._conn = sqlite3.connect(str(self.db_file), timeout=30, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        with self._conn:
+            self._conn.execute('''
+                CREATE TABLE IF NOT EXISTS progress (
+                    novel_id TEXT PRIMARY KEY,
+                    title TEXT NOT NULL,
+                    next_chapter INTEGER NOT NULL,
+                    total_chapters INTEGER NOT NULL,
+                    output_file TEXT,
+                    updated REAL NOT NULL
+                )
+            ''')
+            self._conn.execute('''
+                CREATE TABLE IF NOT EXISTS checkpoints (
+                    novel_id TEXT NOT NULL,
+                    chapter INTEGER NOT NULL,
+                    offset INTEGER NOT NULL,
+                    PRIMARY KEY (novel_id, chapter)
+                )
+            ''')
+            # 待修复章节：文件中写的是占位文本，kind 为 failed（下载失败）或 missing（未找到正文）
+            self._conn.execute('''
+                CREATE TABLE IF NOT EXISTS holes (
+                    novel_id TEXT NOT NULL,
+                    url TEXT NOT NULL,
+                    chapter INTEGER NOT NULL,
+                    title TEXT NOT NULL,
+                    kind TEXT NOT NULL,
+                    placeholder TEXT NOT NULL,
+                    output_file TEXT NOT NULL,
+                    error TEXT,
+                    attempts INTEGER NOT NULL DEFAULT 1,
+                    updated REAL NOT NULL,
+                    PRIMARY KEY (novel_id, url)
+                )
+            ''')
+        if self.db_file == Config.PROGRESS_DB_FILE:
+            # 旧版进度只迁移到默认数据库
+            self._migrate_json()
+
+    def _migrate_json(self):
+        """把旧版 progress.json 导入数据库，完成后重命名为 progress.json.migrated"""
         if not self.progress_file.exists():
-            with open(self.progress_file, 'w', encoding='utf-8') as f:
-                json.dump({}, f, ensure_ascii=False, indent=2)
+            return
+        try:
+            with open(self.progress_file, 'r', encoding='utf-8') as f:
+                progress_data = json.load(f)
+        except Exception as e:
+            self.logger.exception(f"读取旧版进度文件失败: {str(e)}")
+            return
+
+        with self._lock, self._conn:
+            for novel_id, info in progress_data.items():
+                checkpoint = info.get('checkpoint')
+                self._conn.execute(
+                    '''INSERT OR IGNORE INTO progress
+                       (novel_id, title, next_chapter, total_chapters, output_file, updated)
+                       VALUES (?, ?, ?, ?, ?, ?)''',
+                    (novel_id, info['title'], info['next_chapter'], info['total_chapters'],
+                     checkpoint['output_file'] if checkpoint else None, time.time())
+                )
+                if checkpoint:
+                    self._conn.executemany(
+                        'INSERT OR IGNORE INTO checkpoints (novel_id, chapter, offset) VALUES (?, ?, ?)',
+                        [(novel_id, int(num), offset) for num, offset in checkpoint['offsets'].items()]
+                    )
+
+        self.progress_file.replace(self.progress_file.with_name(self.progress_file.name + '.migrated'))
+        self.logger.info(f"已将 {len(progress_data)} 条进度从 {self.progress_file.name} 迁移到数据库")
+
+    @staticmethod
+    def _entry(title, next_chapter, total_chapters):
+        """构造单部小说的进度记录"""
+        return {
+            'title': title,
+            'next_chapter': next_chapter,
+            'total_chapters': total_chapters,
+            'progress': f"{next_chapter-1}/{total_chapters}",
+            'percentage': round((next_chapter-1) / total_chapters * 100, 1) if total_chapters else 0.0
+        }
+
+    def _query(self, order='novel_id', limit=-1, offset=0):
+        """按顺序读取进度记录，返回 {novel_id: 进度}"""
+        with self._lock:
+            rows = self._conn.execute(
+                f'''SELECT novel_id, title, next_chapter, total_chapters FROM progress
+                    ORDER BY {order} LIMIT ? OFFSET ?''',
+                (limit, offset)
+            ).fetchall()
+        return {novel_id: self._entry(*fields) for novel_id, *fields in rows}
 
     def load_progress(self):
         """加载所有进度数据"""
         try:
-            with open(self.progress_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            return self._query()
         except Exception as e:
             self.logger.exception(f"加载进度数据失败: {str(e)}")
             return {}
 
     def save_progress(self, progress_data):
-        """保存进度数据"""
+        """用 progress_data 替换全部进度数据"""
         try:
-            with open(self.progress_file, 'w', encoding='utf-8') as f:
-                json.dump(progress_data, f, ensure_ascii=False, indent=2)
+            with self._lock, self._conn:
+                self._conn.execute('DELETE FROM progress')
+                self._conn.execute('DELETE FROM checkpoints')
+                self._conn.executemany(
+                    '''INSERT INTO progress (novel_id, title, next_chapter, total_chapters, updated)
+                       VALUES (?, ?, ?, ?, ?)''',
+                    [(novel_id, info['title'], info['next_chapter'], info['total_chapters'], time.time())
+                     for novel_id, info in progress_data.items()]
+                )
+                # 没有进度的小说，其待修复记录也一并清除
+                self._conn.execute('DELETE FROM holes WHERE novel_id NOT IN (SELECT novel_id FROM progress)')
             return True
         except Exception as e:
             self.logger.exception(f"保存进度数据失败: {str(e)}")
             return False
 
-    def update_progress(self, novel_id, title, next_chapter, total_chapters):
-        """更新小说的下载进度"""
-        progress_data = self.load_progress()
-
-        progress_data[novel_id] = {
-            'title': title,
-            'next_chapter': next_chapter,
-            'total_chapters': total_chapters,
-            'progress': f"{next_chapter-1}/{total_chapters}",
-            'percentage': round((next_chapter-1) / total_chapters * 100, 1)
-        }
-
-        self.save_progress(progress_data)
+    def update_progress(self, novel_id, title, next_chapter, total_chapters, checkpoint=None):
+        """更新小说的下载进度
+
+        checkpoint 为 {'output_file', 'offsets'} 时替换章节检查点，否则保留原检查点
+        """
+        with self._lock, self._conn:
+            self._conn.execute(
+                '''INSERT INTO progress (novel_id, title, next_chapter, total_chapters, updated)
+                   VALUES (?, ?, ?, ?, ?)
+                   ON CONFLICT (novel_id) DO UPDATE SET
+                       title = excluded.title,
+                       next_chapter = excluded.next_chapter,
+                       total_chapters = excluded.total_chapters,
+                       updated = excluded.updated''',
+                (novel_id, title, next_chapter, total_chapters, time.time())
+            )
+            if checkpoint is not None:
+                self._conn.execute(
+                    'UPDATE progress SET output_file = ? WHERE novel_id = ?',
+                    (str(checkpoint['output_file']), novel_id)
+                )
+                self._conn.execute('DELETE FROM checkpoints WHERE novel_id = ?', (novel_id,))
+                self._conn.executemany(
+                    'INSERT INTO checkpoints (novel_id, chapter, offset) VALUES (?, ?, ?)',
+                    [(novel_id, num, offset) for num, offset in checkpoint['offsets'].items()]
+                )
         self.logger.info(f"更新进度: 小说《{title}》下一章节: {next_chapter}")
 
+    def record_chapter(self, novel_id, title, chapter_num, offset, total_chapters):
+        """记录一个章节已完整写入输出文件，offset 为该章节结束位置的字节偏移"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                '''INSERT INTO progress (novel_id, title, next_chapter, total_chapters, updated)
+                   VALUES (?, ?, ?, ?, ?)
+                   ON CONFLICT (novel_id) DO UPDATE SET
+                       title = excluded.title,
+                       next_chapter = excluded.next_chapter,
+                       total_chapters = excluded.total_chapters,
+                       updated = excluded.updated''',
+                (novel_id, title, chapter_num + 1, total_chapters, time.time())
+            )
+            self._conn.execute(
+                '''INSERT OR REPLACE INTO checkpoints (novel_id, chapter, offset)
+                   SELECT novel_id, ?, ? FROM progress WHERE novel_id = ? AND output_file IS NOT NULL''',
+                (chapter_num, offset, novel_id)
+            )
+        self.logger.debug(f"记录检查点: 小说《{title}》第{chapter_num}章，偏移 {offset}")
+
+    def get_checkpoint(self, novel_id):
+        """获取章节检查点 {'output_file', 'offsets': {章节序号: 结束偏移}}，没有返回 None"""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT output_file FROM progress WHERE novel_id = ?', (novel_id,)
+            ).fetchone()
+            if not row or row[0] is None:
+                return None
+            offsets = dict(self._conn.execute(
+                'SELECT chapter, offset FROM checkpoints WHERE novel_id = ?', (novel_id,)
+            ).fetchall())
+        return {'output_file': row[0], 'offsets': offsets}
+
+    def clear_checkpoint(self, novel_id):
+        """清除章节检查点（输出文件被整体改写后偏移不再有效）"""
+        with self._lock, self._conn:
+            self._conn.execute('UPDATE progress SET output_file = NULL WHERE novel_id = ?', (novel_id,))
+            self._conn.execute('DELETE FROM checkpoints WHERE novel_id = ?', (novel_id,))
+
+    def shift_offsets(self, novel_id, from_chapter, delta):
+        """文件中第 from_chapter 章的内容长度变化 delta 字节后，平移该章及之后章节的偏移"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                'UPDATE checkpoints SET offset = offset + ? WHERE novel_id = ? AND chapter >= ?',
+                (delta, novel_id, from_chapter)
+            )
+
+    def record_hole(self, novel_id, chapter_num, url, chapter_title, kind, placeholder, output_file, error=None):
+        """把写入了占位文本的章节加入待修复队列，已在队列中时累加尝试次数"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                '''INSERT INTO holes
+                   (novel_id, url, chapter, title, kind, placeholder, output_file, error, updated)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                   ON CONFLICT (novel_id, url) DO UPDATE SET
+                       chapter = excluded.chapter,
+                       title = excluded.title,
+                       kind = excluded.kind,
+                       placeholder = excluded.placeholder,
+                       output_file = excluded.output_file,
+                       error = excluded.error,
+                       attempts = attempts + 1,
+                       updated = excluded.updated''',
+                (novel_id, url, chapter_num, chapter_title, kind, placeholder, str(output_file), error, time.time())
+            )
+        self.logger.info(f"章节加入待修复队列: 小说 {novel_id} 第{chapter_num}章 {chapter_title} ({kind})")
+
+    def get_holes(self, novel_id=None, kinds=None):
+        """读取待修复章节，可按小说和类型筛选，按小说ID和章节顺序排列"""
+        conditions, params = [], []
+        if novel_id is not None:
+            conditions.append('novel_id = ?')
+            params.append(novel_id)
+        if kinds:
+            conditions.append(f"kind IN ({', '.join('?' * len(kinds))})")
+            params.extend(kinds)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+        with self._lock:
+            rows = self._conn.execute(
+                f'''SELECT novel_id, chapter, url, title, kind, placeholder, output_file, error, attempts
+                    FROM holes {where} ORDER BY novel_id, chapter''',
+                params
+            ).fetchall()
+        fields = ('novel_id', 'chapter', 'url', 'title', 'kind', 'placeholder', 'output_file', 'error', 'attempts')
+        return [dict(zip(fields, row)) for row in rows]
+
+    def remove_hole(self, novel_id, url):
+        """章节修复后移出待修复队列"""
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM holes WHERE novel_id = ? AND url = ?', (novel_id, url))
+
+    def clear_holes(self, novel_id, from_chapter=1):
+        """重新下载前清除第 from_chapter 章及之后的待修复记录（这部分文件内容将被重写）"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                'DELETE FROM holes WHERE novel_id = ? AND chapter >= ?', (novel_id, from_chapter)
+            )
+
     def get_novel_progress(self, novel_id):
         """获取指定小说的进度"""
-        progress_data = self.load_progress()
-        return progress_data.get(novel_id)
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT title, next_chapter, total_chapters FROM progress WHERE novel_id = ?', (novel_id,)
+            ).fetchone()
+        return self._entry(*row) if row else None
 
     def clear_progress(self, novel_id):
-        """清除指定小说的进度"""
-        progress_data = self.load_progress()
-        if novel_id in progress_data:
-            title = progress_data[novel_id]['title']
-            del progress_data[novel_id]
-            self.save_progress(progress_data)
-            self.logger.info(f"清除进度: 小说《{title}》")
-            return True
-        return False
+        """清除指定小说的进度、检查点和待修复记录"""
+        progress = self.get_novel_progress(novel_id)
+        if not progress:
+            return False
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM progress WHERE novel_id = ?', (novel_id,))
+            self._conn.execute('DELETE FROM checkpoints WHERE novel_id = ?', (novel_id,))
+            self._conn.execute('DELETE FROM holes WHERE novel_id = ?', (novel_id,))
+        self.logger.info(f"清除进度: 小说《{progress['title']}》")
+        return True
 
     def clear_all_progress(self):
         """清除所有进度"""
@@ -75,14 +304,33 @@ class ProgressManager:
         self.logger.info("清除所有进度")
         return True
 
-    def view_progress(self):
-        """查看所有进度"""
-        progress_data = self.load_progress()
+    def count(self):
+        """进度记录数量"""
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM progress').fetchone()[0]
+
+    def view_progress(self, sort_by='updated', page=None, page_size=None):
+        """查看进度列表
 
-        if not progress_data:
+        sort_by 为 updated（最近更新）、title、percentage 或 id；指定 page 时
+        按 page_size（默认 Config.PROGRESS_PAGE_SIZE）分页显示
+        """
+        if sort_by not in self.SORT_ORDERS:
+            raise ValueError(f"不支持的排序方式: {sort_by}，可选: {', '.join(self.SORT_ORDERS)}")
+
+        total = self.count()
+        if not total:
             print("📊 没有下载进度记录")
             return
 
+        if page is None:
+            progress_data = self._query(self.SORT_ORDERS[sort_by])
+        else:
+            page_size = page_size or Config.PROGRESS_PAGE_SIZE
+            pages = (total + page_size - 1) // page_size
+            page = min(max(1, page), pages)
+            progress_data = self._query(self.SORT_ORDERS[sort_by], page_size, (page - 1) * page_size)
+
         print("\n📊 下载进度列表：")
         print("=" * 80)
         print(f"{'小说ID':<26} {'书名':<30} {'进度':<12} {'百分比':<8}")
@@ -93,6 +341,35 @@ class ProgressManager:
             print(f"{novel_id:<26} {title:<30} {info['progress']:<12} {info['percentage']:>6}%")
 
         print("=" * 80)
+        if page is not None:
+            print(f"📄 第 {page}/{pages} 页，共 {total} 条记录")
+
+    def view_holes(self, novel_id=None):
+        """查看待修复章节队列"""
+        holes = self.get_holes(novel_id)
+        if not holes:
+            print("🧩 没有待修复的章节")
+            return
+
+        kind_names = {'failed': '下载失败', 'missing': '未找到正文'}
+        print("\n🧩 待修复章节列表：")
+        print("=" * 80)
+        print(f"{'小说ID':<12} {'章节':<8} {'标题':<30} {'类型':<10} {'尝试次数':<8}")
+        print("-" * 80)
+        for hole in holes:
+            title = hole['title'] if len(hole['title']) <= 28 else hole['title'][:25] + "..."
+            print(f"{hole['novel_id']:<12} {hole['chapter']:<8} {title:<30} "
+                  f"{kind_names.get(hole['kind'], hole['kind']):<10} {hole['attempts']:<8}")
+            if hole['error']:
+                print(f"{'':<12} ❌ {hole['error']}")
+        print("=" * 80)
+        failed = sum(1 for hole in holes if hole['kind'] == 'failed')
+        print(f"📄 共 {len(holes)} 个章节，其中下载失败 {failed} 个，未找到正文 {len(holes) - failed} 个")
+
+    def close(self):
+        """关闭数据库连接"""
+        with self._lock:
+            self._conn.close()
 
     def interactive_manage(self):
         """交互式管理下载进度"""
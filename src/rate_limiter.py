@@ -0,0 +1,120 @@
+import threading
+import time
+from urllib.parse import urlparse
+from .config import Config
+from .logger import setup_logger
+
+class _HostBucket:
+    """单个主机的令牌桶状态"""
+
+    def __init__(self, rate):
+        self.rate = rate
+        self.tokens = Config.RATE_LIMIT_BURST
+        self.updated = time.monotonic()
+        self.latency = None  # 响应耗时的指数移动平均
+        self.samples = 0
+        self.baseline = None  # 观测到的最低平均耗时
+        self.last_decrease = 0.0
+
+class AdaptiveRateLimiter:
+    """按主机划分的自适应令牌桶限速器
+
+    响应健康时加性提高速率，遇到 429、5xx、网络错误或耗时明显上升时
+    乘性降低速率（AIMD），速率始终限制在 [RATE_LIMIT_MIN, RATE_LIMIT_MAX] 内。
+    """
+
+    def __init__(self, initial_rate=None, min_rate=None, max_rate=None):
+        """初始化限速器"""
+        self.logger = setup_logger('rate_limiter')
+        self.initial_rate = initial_rate or Config.RATE_LIMIT_INITIAL
+        self.min_rate = min_rate or Config.RATE_LIMIT_MIN
+        self.max_rate = max_rate or Config.RATE_LIMIT_MAX
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def _bucket(self, url):
+        """获取URL所属主机的令牌桶（调用方需持有锁）"""
+        host = urlparse(url).netloc
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            bucket = self._buckets[host] = _HostBucket(self.initial_rate)
+        return bucket
+
+    def _refill(self, bucket):
+        """按流逝时间补充令牌（调用方需持有锁）"""
+        now = time.monotonic()
+        bucket.tokens = min(
+            Config.RATE_LIMIT_BURST,
+            bucket.tokens + (now - bucket.updated) * bucket.rate
+        )
+        bucket.updated = now
+
+    def delay(self, url):
+        """返回现在请求该主机需要等待的秒数，不消耗令牌"""
+        with self._lock:
+            bucket = self._bucket(url)
+            self._refill(bucket)
+            if bucket.tokens >= 1:
+                return 0
+            return (1 - bucket.tokens) / bucket.rate
+
+    def reserve(self, url):
+        """预留一个令牌，返回调用方需要等待的秒数"""
+        with self._lock:
+            bucket = self._bucket(url)
+            self._refill(bucket)
+            bucket.tokens -= 1
+            if bucket.tokens >= 0:
+                return 0
+            return -bucket.tokens / bucket.rate
+
+    def acquire(self, url):
+        """阻塞直到允许向该主机发送请求"""
+        wait = self.reserve(url)
+        if wait:
+            time.sleep(wait)
+
+    def record(self, url, status=None, latency=None):
+        """记录一次请求结果并调整速率，status 为 None 表示网络错误"""
+        with self._lock:
+            bucket = self._bucket(url)
+
+            slow = False
+            if latency is not None:
+                bucket.samples += 1
+                if bucket.latency is None:
+                    bucket.latency = latency
+                else:
+                    bucket.latency = 0.8 * bucket.latency + 0.2 * latency
+                # 前几次请求只用于预热平均耗时，之后才建立基准
+                if bucket.samples >= 5:
+                    if bucket.baseline is None or bucket.latency < bucket.baseline:
+                        bucket.baseline = bucket.latency
+                    slow = bucket.latency > bucket.baseline * Config.RATE_LIMIT_LATENCY_FACTOR
+
+            throttled = status is None or status == 429 or status >= 500
+            if throttled or slow:
+                # 同一批在途请求的失败只降速一次
+                now = time.monotonic()
+                if now - bucket.last_decrease < max(1.0, bucket.latency or 0):
+                    return
+                bucket.last_decrease = now
+                old_rate = bucket.rate
+                bucket.rate = max(self.min_rate, bucket.rate * Config.RATE_LIMIT_DECREASE)
+                if slow and not throttled:
+                    # 降速后以当前耗时作为新的基准，避免持续降速
+                    bucket.baseline = bucket.latency
+                reason = f"状态码 {status}" if throttled else f"平均耗时升高至 {bucket.latency:.2f}秒"
+                self.logger.info(f"{reason}，请求速率 {old_rate:.2f} -> {bucket.rate:.2f} 次/秒: {url}")
+            else:
+                bucket.rate = min(self.max_rate, bucket.rate + Config.RATE_LIMIT_INCREASE)
+
+    def rate(self, url):
+        """返回该URL所属主机当前的请求速率（次/秒）"""
+        with self._lock:
+            return self._bucket(url).rate
+
+    def rates(self):
+        """返回所有主机当前的请求速率"""
+        with self._lock:
+            return {host: bucket.rate for host, bucket in self._buckets.items()}
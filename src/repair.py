@@ -0,0 +1,168 @@
+import os
+from pathlib import Path
+from .logger import setup_logger
+
+class ChapterHole(str):
+    """未能取得正文的章节
+
+    本身是写入输出文件的占位文本，另外带有类型 kind（failed: 下载失败，
+    missing: 页面中没有正文）和错误信息，写入端据此把章节加入待修复队列。
+    """
+
+    def __new__(cls, kind, text, error=None):
+        hole = super().__new__(cls, text)
+        hole.kind = kind
+        hole.error = error
+        return hole
+
+    @classmethod
+    def failed(cls, error):
+        """下载或解析出错的章节"""
+        return cls('failed', f"[下载失败: {error}]", str(error))
+
+    @classmethod
+    def missing(cls, chapter_title):
+        """页面中没有找到正文的章节"""
+        return cls('missing', f"[章节内容未找到: {chapter_title}]")
+
+class ChapterRepairer:
+    """修复待修复队列中的章节
+
+    只重新下载队列中的章节，在输出文件中找到 "标题 + 占位文本" 所在的
+    章节块并原地替换为正文，其余内容不变；章节检查点的字节偏移随之平移，
+    之后仍可按检查点续传。
+    """
+
+    def __init__(self, downloader):
+        """初始化修复器，复用下载器的会话、缓存和并发设置"""
+        self.logger = setup_logger('repair')
+        self.downloader = downloader
+        self.progress_mgr = downloader.progress_mgr
+        self.stopped = False  # 是否被 Ctrl+C 中断
+
+    def repair(self, novel_id, kinds=('failed',)):
+        """修复一部小说的待修复章节，返回结果字典 {'fixed', 'remaining', 'dropped'}"""
+        result = {'fixed': 0, 'remaining': 0, 'dropped': 0}
+        holes = self.progress_mgr.get_holes(novel_id, kinds)
+        if not holes:
+            print(f"✅ 小说 {novel_id} 没有待修复的章节")
+            return result
+
+        by_file = {}
+        for hole in holes:
+            by_file.setdefault(hole['output_file'], []).append(hole)
+
+        for output_file, file_holes in by_file.items():
+            for key, count in self._repair_file(novel_id, Path(output_file), file_holes).items():
+                result[key] += count
+            if self.stopped:
+                break
+
+        print(f"🧩 小说 {novel_id} 修复完成：修复 {result['fixed']} 章，"
+              f"仍待修复 {result['remaining']} 章")
+        if result['dropped']:
+            print(f"⚠️ 有 {result['dropped']} 个章节已不在输出文件中，已移出待修复队列")
+        return result
+
+    def _repair_file(self, novel_id, output_path, holes):
+        """修复同一个输出文件中的章节"""
+        result = {'fixed': 0, 'remaining': 0, 'dropped': 0}
+        if not output_path.exists():
+            self.logger.warning(f"输出文件不存在，移除待修复记录: {output_path}")
+            for hole in holes:
+                self.progress_mgr.remove_hole(novel_id, hole['url'])
+            result['dropped'] = len(holes)
+            return result
+
+        # 按字节处理：检查点记录的是磁盘上的字节偏移，Windows 下换行写入为 \r\n
+        with open(output_path, 'rb') as f:
+            data = f.read()
+        newline = '\r\n' if b'\r\n' in data else '\n'
+
+        def encode_block(chapter_title, body):
+            return f"\n{chapter_title}\n\n{body}\n\n".replace('\n', newline).encode('utf-8')
+
+        checkpoint = self.progress_mgr.get_checkpoint(novel_id)
+        shift_offsets = checkpoint is not None and checkpoint['output_file'] == str(output_path)
+        offsets = checkpoint['offsets'] if shift_offsets else {}
+
+        # 在文件中定位每个章节块，找不到的说明已被重新下载或手动修改。
+        # 优先用检查点中该章的结束偏移定位，没有检查点时从上一个章节块之后向后查找，
+        # 标题和占位文本相同的章节不会定位到同一处
+        located = []
+        cursor = 0
+        for hole in sorted(holes, key=lambda item: item['chapter']):
+            block = encode_block(hole['title'], hole['placeholder'])
+            end = offsets.get(hole['chapter'])
+            if end is not None and end - len(block) >= cursor and data[end - len(block):end] == block:
+                pos = end - len(block)
+            else:
+                pos = data.find(block, cursor)
+            if pos < 0:
+                self.progress_mgr.remove_hole(novel_id, hole['url'])
+                result['dropped'] += 1
+                continue
+            located.append((pos, block, hole))
+            cursor = pos + len(block)
+
+        print(f"🔧 正在重新下载 {len(located)} 个章节: {output_path.name}")
+        contents = self._fetch_contents([hole for _, _, hole in located])
+
+        parts = []
+        cursor = 0
+        repaired = []
+        for pos, old_block, hole in located:
+            content = contents.get(hole['url'])
+            if content is None:
+                # 本次没有下载到（被中断），保持原样
+                result['remaining'] += 1
+                continue
+
+            new_block = encode_block(hole['title'], content) if content else b''
+            parts.append(data[cursor:pos])
+            parts.append(new_block)
+            cursor = pos + len(old_block)
+            repaired.append((hole, content, len(new_block) - len(old_block)))
+        parts.append(data[cursor:])
+        if not repaired:
+            return result
+
+        temp_path = output_path.with_name(output_path.name + '.tmp')
+        with open(temp_path, 'wb') as f:
+            f.write(b''.join(parts))
+        os.replace(temp_path, output_path)
+
+        # 文件替换完成后再更新队列和检查点
+        for hole, content, delta in repaired:
+            if isinstance(content, ChapterHole):
+                # 再次失败时文件中已换成新的占位文本，队列随之更新
+                self.progress_mgr.record_hole(
+                    novel_id, hole['chapter'], hole['url'], hole['title'],
+                    content.kind, str(content), output_path, content.error
+                )
+                result['remaining'] += 1
+            else:
+                self.progress_mgr.remove_hole(novel_id, hole['url'])
+                result['fixed'] += 1
+            if shift_offsets and delta:
+                self.progress_mgr.shift_offsets(novel_id, hole['chapter'], delta)
+        return result
+
+    def _fetch_contents(self, holes):
+        """并发下载待修复章节，返回 {章节URL: 正文或 ChapterHole}，Ctrl+C 时返回已下载的部分"""
+        tasks = [(hole['chapter'], '', hole['url'], hole['title']) for hole in holes]
+        contents = {}
+        chapter_contents = self.downloader.iter_chapter_contents(tasks)
+        try:
+            for (chapter_num, _, url, chapter_title), content in chapter_contents:
+                contents[url] = content
+                if isinstance(content, ChapterHole):
+                    print(f"❌ [第{chapter_num}章] {chapter_title} 仍未成功: {content}")
+                else:
+                    print(f"✅ [第{chapter_num}章] {chapter_title}")
+        except KeyboardInterrupt:
+            print("\n⚠️ 检测到 Ctrl+C，保存已修复的章节...")
+            self.stopped = True
+        finally:
+            chapter_contents.close()
+        return contents
@@ -0,0 +1,146 @@
+import random
+import threading
+import time
+from collections import deque
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+from .config import Config
+from .logger import setup_logger
+
+# 除 5xx 外值得重试的状态码：超时、限流
+RETRYABLE_STATUS = {408, 425, 429}
+# 换一个账号可能成功的状态码，只有一个账号时重试没有意义
+ACCOUNT_STATUS = {401, 403}
+
+def parse_retry_after(value):
+    """解析 Retry-After 响应头（秒数或 HTTP 日期），返回需要等待的秒数，无法解析返回 None"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+class RetryPolicy:
+    """请求重试策略
+
+    区分可重试错误（网络错误、超时、429、5xx，有其他账号时的 401/403 等）与
+    不可重试错误（404 等），
+    重试间隔为带上限的指数退避加全随机抖动，服务端给出 Retry-After 时
+    至少等待该时长。
+    """
+
+    def __init__(self, base_delay=None, max_delay=None):
+        """初始化重试策略"""
+        self.base_delay = Config.RETRY_DELAY if base_delay is None else base_delay
+        self.max_delay = Config.RETRY_MAX_DELAY if max_delay is None else max_delay
+
+    def should_retry(self, status=None, accounts=None):
+        """判断是否值得重试，status 为 None 表示网络错误或超时
+
+        accounts 为可轮换的账号数，只有一个账号时 401/403 不重试
+        """
+        if status in ACCOUNT_STATUS:
+            return accounts is None or accounts > 1
+        return status is None or status in RETRYABLE_STATUS or status >= 500
+
+    def delay(self, attempt, retry_after=None):
+        """第 attempt 次（从0开始）失败后需要等待的秒数"""
+        backoff = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        retry_after = parse_retry_after(retry_after)
+        if retry_after is not None:
+            return max(backoff, min(retry_after, Config.RETRY_AFTER_MAX))
+        return backoff
+
+class _HostCircuit:
+    """单个主机的断路器状态"""
+
+    def __init__(self):
+        self.outcomes = deque(maxlen=Config.BREAKER_WINDOW)  # 最近请求是否失败
+        self.state = 'closed'
+        self.open_until = 0.0
+        self.cooldown = Config.BREAKER_COOLDOWN
+        self.probe_started = None  # 半开状态下试探请求的开始时间
+
+class CircuitBreaker:
+    """按主机划分的断路器
+
+    最近 BREAKER_WINDOW 次请求中失败比例达到 BREAKER_FAILURE_RATE 时断开，
+    所有线程暂停请求该主机 cooldown 秒；之后进入半开状态，只放行一个试探
+    请求：成功则恢复，失败则再次断开并加倍 cooldown（不超过 BREAKER_MAX_COOLDOWN）。
+    """
+
+    def __init__(self):
+        """初始化断路器"""
+        self.logger = setup_logger('circuit_breaker')
+        self._circuits = {}
+        self._cond = threading.Condition()
+
+    def _circuit(self, url):
+        """获取URL所属主机的断路器状态（调用方需持有锁）"""
+        host = urlparse(url).netloc
+        circuit = self._circuits.get(host)
+        if circuit is None:
+            circuit = self._circuits[host] = _HostCircuit()
+        return circuit
+
+    def wait(self, url):
+        """阻塞直到允许向该主机发送请求"""
+        with self._cond:
+            while True:
+                circuit = self._circuit(url)
+                now = time.monotonic()
+                if circuit.state == 'closed':
+                    return
+                if circuit.state == 'open':
+                    if now < circuit.open_until:
+                        self._cond.wait(circuit.open_until - now)
+                        continue
+                    circuit.state = 'half_open'
+                    circuit.probe_started = None
+
+                # 半开：只放行一个试探请求，试探迟迟没有结果时允许再试一次
+                if circuit.probe_started is None or now - circuit.probe_started > circuit.cooldown:
+                    circuit.probe_started = now
+                    self.logger.info(f"断路器半开，发送试探请求: {url}")
+                    return
+                self._cond.wait(circuit.probe_started + circuit.cooldown - now)
+
+    def record(self, url, failed):
+        """记录一次请求结果，failed 表示网络错误、429 或 5xx"""
+        with self._cond:
+            circuit = self._circuit(url)
+            host = urlparse(url).netloc
+
+            if circuit.state == 'half_open':
+                if failed:
+                    circuit.cooldown = min(circuit.cooldown * 2, Config.BREAKER_MAX_COOLDOWN)
+                    self._open(circuit, host)
+                else:
+                    circuit.state = 'closed'
+                    circuit.cooldown = Config.BREAKER_COOLDOWN
+                    circuit.outcomes.clear()
+                    self.logger.info(f"试探请求成功，断路器恢复: {host}")
+                self._cond.notify_all()
+                return
+
+            if circuit.state == 'open':
+                return
+
+            circuit.outcomes.append(failed)
+            if len(circuit.outcomes) < Config.BREAKER_MIN_REQUESTS:
+                return
+            failure_rate = sum(circuit.outcomes) / len(circuit.outcomes)
+            if failure_rate >= Config.BREAKER_FAILURE_RATE:
+                self.logger.warning(f"主机 {host} 最近请求失败率 {failure_rate:.0%}")
+                self._open(circuit, host)
+
+    def _open(self, circuit, host):
+        """断开断路器（调用方需持有锁）"""
+        circuit.state = 'open'
+        circuit.open_until = time.monotonic() + circuit.cooldown
+        circuit.outcomes.clear()
+        self.logger.warning(f"断路器断开，暂停请求主机 {host} {circuit.cooldown} 秒")
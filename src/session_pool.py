@@ -0,0 +1,185 @@
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from .config import Config
+from .logger import setup_logger
+from .rate_limiter import AdaptiveRateLimiter
+from .retry import CircuitBreaker
+from .hedge import LatencyTracker
+
+class PoolMember:
+    """会话池中的单个账号：独立的 Session 和限速预算"""
+
+    def __init__(self, user_id, cookie, headers, pool_size):
+        self.user_id = user_id
+        self.cookie = cookie
+        self.headers = dict(headers, Cookie=cookie)
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        # 默认连接池每个主机只保留10个连接，并发较高时需要放大
+        adapter = HTTPAdapter(pool_connections=Config.HTTP_POOL_CONNECTIONS, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.rate_limiter = AdaptiveRateLimiter()
+        self.throttled = 0  # 连续收到 429 的次数
+
+class SessionPool:
+    """多账号会话池
+
+    为每个 Cookie 有效的账号维护一个 Session，请求总是分配给当前等待时间
+    最短的账号。Cookie 失效（401/403，池中还有其他账号时）或连续被限流的
+    账号会被暂时移出，冷却后重新读取 Cookie，有效则自动加回。所有账号共用
+    一个按主机划分的断路器，主机大面积出错时暂停全部请求。
+    """
+
+    def __init__(self, auth, user_ids, headers, pool_size=None):
+        """初始化会话池
+
+        Args:
+            auth: AuthManager 实例，用于读取账号 Cookie
+            user_ids: 参与调度的账号编号列表
+            headers: 所有会话共用的基础请求头（不含 Cookie）
+            pool_size: 每个 Session 对单个主机保持的最大连接数，默认 Config.HTTP_POOL_MAXSIZE
+        """
+        self.logger = setup_logger('session_pool')
+        self.auth = auth
+        self.user_ids = list(user_ids)
+        self.headers = dict(headers)
+        self.pool_size = pool_size or Config.HTTP_POOL_MAXSIZE
+        self.members = {}
+        self.suspended = {}  # user_id -> 恢复时间
+        self._lock = threading.Lock()
+        self._last_refresh = 0.0
+        self.breaker = CircuitBreaker()
+        self.latency = LatencyTracker()
+        self.wire_bytes = 0  # 网络上传输的响应体字节数（压缩后）
+        self.decoded_bytes = 0  # 解压后的响应体字节数
+        self.refresh()
+
+    def __len__(self):
+        return len(self.members)
+
+    def refresh(self):
+        """重新读取 Cookie：移除已失效的账号，加回冷却结束且 Cookie 有效的账号"""
+        with self._lock:
+            self._last_refresh = time.monotonic()
+            for user_id in self.user_ids:
+                if self.suspended.get(user_id, 0) > time.monotonic():
+                    continue
+
+                cookie = self.auth.get_cookie(user_id)
+                member = self.members.get(user_id)
+                if not cookie:
+                    if member:
+                        self.logger.warning(f"账号 {user_id} 的Cookie已失效，移出会话池")
+                        del self.members[user_id]
+                    continue
+
+                if member is None or member.cookie != cookie:
+                    if user_id in self.suspended:
+                        self.logger.info(f"账号 {user_id} 冷却结束，重新加入会话池")
+                    self.members[user_id] = PoolMember(user_id, cookie, self.headers, self.pool_size)
+                self.suspended.pop(user_id, None)
+
+    def _suspend(self, member, seconds, reason):
+        """将账号移出会话池一段时间（调用方需持有锁）"""
+        if self.members.get(member.user_id) is not member:
+            return
+        del self.members[member.user_id]
+        self.suspended[member.user_id] = time.monotonic() + seconds
+        self.logger.warning(f"账号 {member.user_id} {reason}，暂停 {seconds} 秒")
+
+    def account_count(self):
+        """参与轮换的账号数（包括冷却中的账号）"""
+        with self._lock:
+            return len(self.members) + len(self.suspended)
+
+    def acquire(self, url):
+        """为请求挑选账号并预留令牌，返回 (member, 需要等待的秒数)"""
+        self.breaker.wait(url)
+        while True:
+            if time.monotonic() - self._last_refresh > Config.POOL_REFRESH_INTERVAL:
+                self.refresh()
+
+            with self._lock:
+                members = list(self.members.values())
+                resume_at = min(self.suspended.values(), default=None)
+
+            if members:
+                member = min(members, key=lambda m: m.rate_limiter.delay(url))
+                return member, member.rate_limiter.reserve(url)
+
+            if resume_at is None:
+                raise Exception("会话池中没有可用的账号Cookie")
+
+            # 所有账号都在冷却，等待最早恢复的账号
+            wait = max(0, resume_at - time.monotonic())
+            self.logger.info(f"所有账号都在冷却中，等待 {wait:.1f} 秒")
+            time.sleep(wait)
+            self.refresh()
+
+    def report(self, member, url, status=None, latency=None):
+        """记录请求结果，更新账号的限速预算和可用状态"""
+        member.rate_limiter.record(url, status, latency)
+        self.breaker.record(url, status is None or status == 429 or status >= 500)
+        if latency is not None and status < 500:
+            self.latency.record(url, latency)
+        with self._lock:
+            if status in (401, 403):
+                if len(self.members) > 1:
+                    self._suspend(member, Config.POOL_SUSPEND_SECONDS, f"返回状态码 {status}，Cookie可能已失效")
+                else:
+                    # 暂停唯一的账号只会让所有请求一起等待冷却
+                    self.logger.warning(f"账号 {member.user_id} 返回状态码 {status}，没有其他可用账号，不暂停")
+            elif status == 429:
+                member.throttled += 1
+                if member.throttled >= Config.POOL_THROTTLE_LIMIT:
+                    self._suspend(member, Config.POOL_SUSPEND_SECONDS, f"连续 {member.throttled} 次被限流")
+            elif status is not None:
+                member.throttled = 0
+
+    def record_traffic(self, url, wire, decoded):
+        """记录一次响应的传输字节数和解压后字节数"""
+        with self._lock:
+            self.wire_bytes += wire
+            self.decoded_bytes += decoded
+        self.logger.debug(f"响应体 {wire} 字节，解压后 {decoded} 字节: {url}")
+
+    def get(self, url, headers=None):
+        """使用池中的账号发送一次 GET 请求（不含重试）"""
+        return self.send(self.reserve(url), url, headers)
+
+    def reserve(self, url):
+        """为请求挑选账号并等到限速令牌可用，返回账号"""
+        member, wait = self.acquire(url)
+        if wait:
+            time.sleep(wait)
+        return member
+
+    def send(self, member, url, headers=None):
+        """用 reserve 得到的账号立即发送一次 GET 请求（不含重试）"""
+        started = time.monotonic()
+        try:
+            resp = member.session.get(
+                url, headers=headers, timeout=(Config.CONNECT_TIMEOUT, Config.READ_TIMEOUT)
+            )
+        except requests.RequestException:
+            self.report(member, url)
+            raise
+        self.report(member, url, resp.status_code, time.monotonic() - started)
+        # 响应体已读取完毕，raw.tell() 为从连接上读到的压缩字节数
+        self.record_traffic(url, resp.raw.tell(), len(resp.content))
+        return resp
+
+    def rates(self):
+        """返回每个在池账号对各主机的当前请求速率"""
+        with self._lock:
+            members = list(self.members.values())
+        return {member.user_id: member.rate_limiter.rates() for member in members}
+
+    def close(self):
+        """关闭所有会话"""
+        with self._lock:
+            for member in self.members.values():
+                member.session.close()
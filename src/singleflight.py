@@ -0,0 +1,80 @@
+import asyncio
+import threading
+from concurrent.futures import Future
+
+def request_key(url, headers=None):
+    """请求的合并键：URL 相同且附加请求头（如条件请求头）相同的 GET 视为同一个请求"""
+    return url, tuple(sorted((headers or {}).items()))
+
+class SingleFlight:
+    """合并并发的相同请求（线程版本）
+
+    同一个键的请求正在进行时，后来的调用不再发起请求，而是等待
+    进行中的请求并共享它的结果或异常；请求完成后不缓存结果。
+    """
+
+    def __init__(self):
+        self.calls = 0  # 调用总数
+        self.shared = 0  # 等待并共享了进行中请求结果的调用数
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn, *args, **kwargs):
+        """执行 fn(*args, **kwargs)，同一个键的并发调用只执行一次"""
+        with self._lock:
+            self.calls += 1
+            future = self._inflight.get(key)
+            if future is not None:
+                self.shared += 1
+                leader = False
+            else:
+                future = self._inflight[key] = Future()
+                leader = True
+        if not leader:
+            return future.result()
+
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            self._forget(key)
+            # Ctrl+C 只应中断发起请求的线程，等待方收到普通异常
+            future.set_exception(e if isinstance(e, Exception) else Exception("请求已中断"))
+            raise
+        self._forget(key)
+        future.set_result(result)
+        return result
+
+    def _forget(self, key):
+        """请求结束，之后的调用重新发起请求"""
+        with self._lock:
+            del self._inflight[key]
+
+class AsyncSingleFlight:
+    """合并并发的相同请求（协程版本，只能在同一个事件循环中使用）
+
+    等待方被取消时不影响进行中的请求，所有等待方都被取消后才取消请求。
+    """
+
+    def __init__(self):
+        self.calls = 0  # 调用总数
+        self.shared = 0  # 等待并共享了进行中请求结果的调用数
+        self._inflight = {}  # 键 -> [请求任务, 等待方数量]
+
+    async def do(self, key, coro_fn, *args):
+        """执行 await coro_fn(*args)，同一个键的并发调用只执行一次"""
+        self.calls += 1
+        entry = self._inflight.get(key)
+        if entry is None:
+            task = asyncio.ensure_future(coro_fn(*args))
+            entry = self._inflight[key] = [task, 0]
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            self.shared += 1
+
+        entry[1] += 1
+        try:
+            return await asyncio.shield(entry[0])
+        finally:
+            entry[1] -= 1
+            if not entry[1] and not entry[0].done():
+                entry[0].cancel()
@@ -0,0 +1,333 @@
+import json
+import os
+import re
+import time
+from pathlib import Path
+from .config import Config
+from .logger import setup_logger
+from .repair import ChapterHole
+
+class SnapshotManager:
+    """目录快照管理类
+
+    快照记录输出文件中已按顺序写入的章节目录，以及目录页的 ETag /
+    Last-Modified，供 sync 命令比较目录差异和发送条件请求。
+    """
+
+    def __init__(self, snapshot_dir=None):
+        """初始化快照管理器"""
+        self.logger = setup_logger('sync')
+        self.snapshot_dir = snapshot_dir or Config.SNAPSHOT_DIR
+        self.snapshot_dir.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, novel_id):
+        """快照文件路径"""
+        return self.snapshot_dir / f"{re.sub(r'[^0-9A-Za-z_-]', '_', str(novel_id))}.json"
+
+    def load(self, novel_id):
+        """读取快照，不存在返回 None"""
+        path = self._path(novel_id)
+        if not path.exists():
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                snapshot = json.load(f)
+            snapshot['volumes'] = [
+                (volume_title, [tuple(chapter) for chapter in chapters])
+                for volume_title, chapters in snapshot['volumes']
+            ]
+            return snapshot
+        except Exception as e:
+            self.logger.exception(f"读取目录快照失败: {path}, 错误: {str(e)}")
+            return None
+
+    def save(self, novel_info, output_path, volumes):
+        """保存快照，volumes 为输出文件中已写入的章节目录"""
+        snapshot = {
+            'id': novel_info['id'],
+            'title': novel_info['title'],
+            'output_file': str(output_path),
+            'volumes': volumes,
+            'chapter_count': sum(len(chapters) for _, chapters in volumes),
+            'total_chapters': novel_info['total_chapters'],
+            'etag': novel_info.get('etag'),
+            'last_modified': novel_info.get('last_modified'),
+            'updated_at': time.time()
+        }
+        with open(self._path(novel_info['id']), 'w', encoding='utf-8') as f:
+            json.dump(snapshot, f, ensure_ascii=False)
+        self.logger.info(f"保存目录快照: 《{novel_info['title']}》共{snapshot['chapter_count']}章")
+
+    def record_download(self, novel_info, output_path, start_chapter, last_chapter):
+        """download_novel 写完第 start_chapter 到 last_chapter 章后更新快照
+
+        只有输出文件从第1章起连续时才记录，否则保留原快照不动
+        """
+        if last_chapter < start_chapter:
+            return
+
+        if start_chapter > 1:
+            snapshot = self.load(novel_info['id'])
+            if (not snapshot or snapshot['output_file'] != str(output_path)
+                    or snapshot['chapter_count'] != start_chapter - 1):
+                return
+
+        self.save(novel_info, output_path, truncate_volumes(novel_info['volumes'], last_chapter))
+
+def truncate_volumes(volumes, chapter_count):
+    """截取目录的前 chapter_count 章，保留卷结构"""
+    result = []
+    remaining = chapter_count
+    for volume_title, chapters in volumes:
+        if remaining <= 0:
+            break
+        result.append((volume_title, list(chapters[:remaining])))
+        remaining -= len(chapters)
+    return result
+
+def flatten_volumes(volumes):
+    """展开目录为 [(卷标题, 章节URL, 章节标题, 是否卷首章节)]"""
+    return [
+        (volume_title, url, chapter_title, i == 0)
+        for volume_title, chapters in volumes
+        for i, (url, chapter_title) in enumerate(chapters)
+    ]
+
+def match_chapters(old_chapters, new_chapters):
+    """把新目录的章节对应到旧目录，返回与 new_chapters 等长的列表，元素为旧目录序号或 None
+
+    先按章节URL匹配；URL 变化的章节再按 (卷标题, 章节标题, 第几个同名章节) 匹配，
+    同一卷中的同名章节（如多个"番外"）按出现顺序分别对应
+    """
+    matches = [None] * len(new_chapters)
+    old_by_url = {}
+    for index, (_, url, _, _) in enumerate(old_chapters):
+        old_by_url.setdefault(url, index)
+    matched = set()
+    for index, (_, url, _, _) in enumerate(new_chapters):
+        old_index = old_by_url.get(url)
+        if old_index is not None and old_index not in matched:
+            matches[index] = old_index
+            matched.add(old_index)
+
+    def by_occurrence(chapters, indices):
+        keys, seen = {}, {}
+        for index in indices:
+            volume_title, _, chapter_title, _ = chapters[index]
+            occurrence = seen.get((volume_title, chapter_title), 0)
+            seen[(volume_title, chapter_title)] = occurrence + 1
+            keys[(volume_title, chapter_title, occurrence)] = index
+        return keys
+
+    unmatched_old = by_occurrence(old_chapters, [i for i in range(len(old_chapters)) if i not in matched])
+    unmatched_new = by_occurrence(new_chapters, [i for i, old_index in enumerate(matches) if old_index is None])
+    for key, index in unmatched_new.items():
+        if key in unmatched_old:
+            matches[index] = unmatched_old[key]
+    return matches
+
+class NovelSyncer:
+    """增量同步连载小说
+
+    对比最新目录与快照，只下载新增或URL变化的章节，并把它们插入到
+    输出文件中对应的卷位置；目录页未变化时直接跳过。
+    """
+
+    def __init__(self, downloader):
+        """初始化同步器，复用下载器的会话、缓存和并发设置"""
+        self.logger = setup_logger('sync')
+        self.downloader = downloader
+        self.snapshots = downloader.snapshots
+
+    def sync(self, novel_id):
+        """同步一部小说，返回结果字典 {'status', 'new', 'changed', 'removed'}"""
+        result = {'status': 'unchanged', 'new': 0, 'changed': 0, 'removed': 0}
+
+        snapshot = self.snapshots.load(novel_id)
+        if not snapshot or not Path(snapshot['output_file']).exists():
+            print(f"📭 小说 {novel_id} 没有可用的同步记录，开始完整下载")
+            if not self.downloader.download_novel(novel_id, refresh=True):
+                # 下载被中断，不能当作完成的首次同步继续后面的小说
+                raise KeyboardInterrupt
+            result['status'] = 'initial'
+            return result
+
+        print(f"🔍 正在检查《{snapshot['title']}》的目录更新...")
+        if snapshot['chapter_count'] < snapshot.get('total_chapters', 0):
+            # 上次只下载了部分章节，不能因为目录页未变化而跳过
+            novel_info = self.downloader.fetch_novel_info(novel_id)
+        else:
+            novel_info = self.downloader.fetch_novel_info(
+                novel_id, etag=snapshot.get('etag'), last_modified=snapshot.get('last_modified')
+            )
+        if novel_info is None:
+            print(f"✅ 《{snapshot['title']}》目录未变化")
+            return result
+
+        output_path = Path(snapshot['output_file'])
+        old_chapters = flatten_volumes(snapshot['volumes'])
+        new_chapters = flatten_volumes(novel_info['volumes'])
+
+        # 按URL、其次按标题和同名序号识别章节
+        matches = match_chapters(old_chapters, new_chapters)
+        added = [index for index, old_index in enumerate(matches) if old_index is None]
+        changed = [
+            index for index, old_index in enumerate(matches)
+            if old_index is not None and old_chapters[old_index][1] != new_chapters[index][1]
+        ]
+        result['removed'] = len(old_chapters) - (len(new_chapters) - len(added))
+
+        if not added and not changed:
+            print(f"✅ 《{novel_info['title']}》没有新章节")
+            self.snapshots.save(novel_info, output_path, snapshot['volumes'])
+            return result
+
+        print(f"🆕 发现 {len(added)} 个新章节，{len(changed)} 个章节地址变化")
+        with open(output_path, 'r', encoding='utf-8') as f:
+            text = f.read()
+
+        contents = self._fetch_contents(new_chapters, added + changed)
+        edits = self._plan_edits(text, old_chapters, new_chapters, matches, contents)
+
+        # 按位置拼接出新文件，先写临时文件再替换
+        parts = []
+        cursor = 0
+        for start, end, _, block in sorted(edits, key=lambda edit: (edit[0], edit[2])):
+            parts.append(text[cursor:start])
+            parts.append(block)
+            cursor = max(cursor, end)
+        parts.append(text[cursor:])
+
+        temp_path = output_path.with_name(output_path.name + '.tmp')
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.write(''.join(parts))
+        os.replace(temp_path, output_path)
+
+        self.snapshots.save(novel_info, output_path, novel_info['volumes'])
+        total_chapters = novel_info['total_chapters']
+        self.downloader.progress_mgr.update_progress(
+            novel_id, novel_info['title'], total_chapters + 1, total_chapters
+        )
+        # 文件已整体改写，原章节偏移失效
+        self.downloader.progress_mgr.clear_checkpoint(novel_id)
+        holes = self._record_holes(novel_id, output_path, new_chapters, contents)
+
+        result.update(status='updated', new=len(added), changed=len(changed))
+        print(f"✅ 《{novel_info['title']}》同步完成：新增 {len(added)} 章，更新 {len(changed)} 章")
+        if result['removed']:
+            print(f"⚠️ 有 {result['removed']} 个章节已从目录中移除，文件中保留原内容")
+        self.downloader.report_holes(novel_id, holes)
+        return result
+
+    def _record_holes(self, novel_id, output_path, new_chapters, contents):
+        """把写入了占位文本的章节加入待修复队列，返回各类型的章节数"""
+        holes = {'failed': 0, 'missing': 0}
+        for index, (_, url, chapter_title, _) in enumerate(new_chapters):
+            content = contents.get(index)
+            num = index + 1
+            if isinstance(content, ChapterHole):
+                self.downloader.progress_mgr.record_hole(
+                    novel_id, num, url, chapter_title, content.kind, str(content), output_path, content.error
+                )
+                holes[content.kind] += 1
+        return holes
+
+    def _fetch_contents(self, new_chapters, targets):
+        """并发下载需要写入的章节，targets 为新目录序号，返回 {新目录序号: 正文}"""
+        tasks = [
+            (index + 1, '', new_chapters[index][1], new_chapters[index][2])
+            for index in sorted(targets)
+        ]
+
+        contents = {}
+        chapter_contents = self.downloader.iter_chapter_contents(tasks)
+        try:
+            for (chapter_num, _, _, chapter_title), content in chapter_contents:
+                contents[chapter_num - 1] = content
+                if isinstance(content, ChapterHole):
+                    print(f"❌ [{chapter_num}/{len(new_chapters)}] {chapter_title} {content}")
+                else:
+                    print(f"✅ [{chapter_num}/{len(new_chapters)}] {chapter_title}")
+        finally:
+            chapter_contents.close()
+        return contents
+
+    def _locate(self, text, old_chapters):
+        """按目录顺序在文件中定位已写入章节的标题位置，返回 {旧目录序号: 位置}
+
+        从上一个章节之后继续查找，同名章节按出现顺序定位到各自的位置
+        """
+        positions = {}
+        cursor = 0
+        for index, (_, _, chapter_title, _) in enumerate(old_chapters):
+            pos = text.find(f"\n{chapter_title}\n\n", cursor)
+            if pos < 0:
+                continue
+            positions[index] = pos
+            cursor = pos + len(chapter_title) + 3
+
+        missing = len(old_chapters) - len(positions)
+        if missing:
+            self.logger.warning(f"有 {missing} 个已下载章节无法在文件中定位")
+            print(f"⚠️ 有 {missing} 个已下载章节无法在文件中定位，相关新章节将追加到文件末尾")
+        return positions
+
+    def _plan_edits(self, text, old_chapters, new_chapters, matches, contents):
+        """计算文件修改列表 [(起始位置, 结束位置, 目录序号, 写入内容)]
+
+        matches 为 match_chapters 的结果，contents 为 {新目录序号: 正文}
+        """
+        positions = self._locate(text, old_chapters)
+        located_volumes = {old_chapters[index][0] for index in positions}
+
+        def block_start(old_index):
+            """章节块的起始位置：卷首章节包含其前面的卷标题"""
+            pos = positions[old_index]
+            volume_title, _, _, is_first = old_chapters[old_index]
+            header = f"\n{volume_title}\n\n"
+            if is_first and volume_title and text[:pos].endswith(header):
+                return pos - len(header)
+            return pos
+
+        # 每个章节之后第一个已定位的旧章节，用于确定插入位置
+        next_located = [None] * len(new_chapters)
+        following = None
+        for index in range(len(new_chapters) - 1, -1, -1):
+            next_located[index] = following
+            if matches[index] in positions:
+                following = matches[index]
+
+        # 文件中每个已定位章节之后的下一个已定位旧章节，地址变化的章节只替换到这里，
+        # 中间已从目录移除的旧章节保留在文件中
+        located = sorted(positions, key=positions.get)
+        next_in_file = dict(zip(located, located[1:]))
+
+        edits = []
+        for index, (volume_title, _, chapter_title, is_first) in enumerate(new_chapters):
+            if index not in contents:
+                continue
+
+            content = contents[index]
+            block = f"\n{chapter_title}\n\n{content}\n\n" if content else ''
+            old_index = matches[index]
+
+            if old_index in positions:
+                # 地址变化的章节：替换到文件中下一个旧章节之前
+                following_old = next_in_file.get(old_index)
+                end = block_start(following_old) if following_old is not None else len(text)
+                edits.append((positions[old_index], end, index, block))
+                continue
+
+            if is_first and volume_title and volume_title not in located_volumes:
+                block = f"\n{volume_title}\n\n" + block
+
+            anchor = next_located[index]
+            if anchor is None:
+                start = len(text)
+            elif old_chapters[anchor][0] == volume_title:
+                start = positions[anchor]
+            else:
+                start = block_start(anchor)
+            edits.append((start, start, index, block))
+
+        return edits
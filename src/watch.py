@@ -0,0 +1,222 @@
+import json
+import os
+import random
+import time
+from datetime import datetime
+from .config import Config
+from .logger import setup_logger
+from .sync import NovelSyncer
+
+def parse_watch_file(path):
+    """读取关注列表，返回 {小说ID: 轮询间隔秒数或 None}
+
+    每行一部小说，格式为 "小说ID [轮询间隔分钟]"，# 之后为注释
+    """
+    watched = {}
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_no, line in enumerate(f, 1):
+            fields = line.split('#', 1)[0].split()
+            if not fields:
+                continue
+            if len(fields) > 2:
+                raise ValueError(f"第{line_no}行格式错误: {line.strip()}")
+            interval = None
+            if len(fields) == 2:
+                try:
+                    interval = float(fields[1]) * 60
+                except ValueError:
+                    raise ValueError(f"第{line_no}行轮询间隔无效: {fields[1]}")
+                if interval <= 0:
+                    raise ValueError(f"第{line_no}行轮询间隔无效: {fields[1]}")
+            watched[fields[0]] = interval
+    return watched
+
+class WatchStatus:
+    """关注小说的轮询状态，保存在 DATA_DIR 下的 JSON 文件中
+
+    每部小说记录书名、当前轮询间隔、下次轮询时间和最近一次结果，
+    watch 重启后沿用原有的间隔和时间表。
+    """
+
+    def __init__(self, status_file=None):
+        """初始化状态文件"""
+        self.logger = setup_logger('watch')
+        self.status_file = status_file or Config.WATCH_STATUS_FILE
+        Config.DATA_DIR.mkdir(parents=True, exist_ok=True)
+        self.novels = self._load()
+
+    def _load(self):
+        """读取状态文件，不存在或损坏时返回空字典"""
+        if not self.status_file.exists():
+            return {}
+        try:
+            with open(self.status_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            self.logger.warning(f"读取轮询状态失败: {self.status_file}, 错误: {str(e)}")
+            return {}
+
+    def save(self):
+        """写入状态文件，先写临时文件再替换"""
+        temp_path = self.status_file.with_name(self.status_file.name + '.tmp')
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.novels, f, ensure_ascii=False, indent=2)
+        os.replace(temp_path, self.status_file)
+
+    def view(self):
+        """查看所有关注小说的轮询状态"""
+        if not self.novels:
+            print("👀 没有轮询记录")
+            return
+
+        def format_time(timestamp):
+            return datetime.fromtimestamp(timestamp).strftime('%m-%d %H:%M') if timestamp else '-'
+
+        print("\n👀 关注小说轮询状态：")
+        print("=" * 100)
+        print(f"{'小说ID':<12} {'书名':<24} {'间隔':<8} {'上次轮询':<12} {'下次轮询':<12} {'结果':<10}")
+        print("-" * 100)
+        for novel_id, state in sorted(self.novels.items(), key=lambda item: item[1].get('next_poll', 0)):
+            title = state.get('title') or '-'
+            title = title if len(title) <= 22 else title[:19] + "..."
+            interval = f"{state['interval'] / 60:.0f}分钟"
+            result = state.get('last_result') or '-'
+            print(f"{novel_id:<12} {title:<24} {interval:<8} {format_time(state.get('last_poll')):<12} "
+                  f"{format_time(state.get('next_poll')):<12} {result:<10}")
+            if state.get('last_error'):
+                print(f"{'':<12} ❌ {state['last_error']}")
+        print("=" * 100)
+
+class NovelWatcher:
+    """定时轮询关注的小说并下载新章节
+
+    常驻进程复用同一个下载器（会话池和Cookie保持热状态），按每部小说各自的
+    间隔轮询目录页，通过 NovelSyncer 只下载新章节。没有更新时轮询间隔按
+    WATCH_BACKOFF 倍数逐步放宽（不超过 WATCH_MAX_INTERVAL），有更新后恢复
+    基础间隔；每次的等待时间带有随机抖动，避免所有小说同时请求。
+    """
+
+    def __init__(self, downloader, watch_file=None, interval=None, status=None):
+        """初始化轮询器
+
+        Args:
+            downloader: NovelDownloader 实例
+            watch_file: 关注列表文件，默认 Config.WATCH_FILE，修改后自动重新读取
+            interval: 列表中未指定间隔的小说使用的基础轮询间隔（秒）
+            status: WatchStatus 实例
+        """
+        self.logger = setup_logger('watch')
+        self.syncer = NovelSyncer(downloader)
+        self.downloader = downloader
+        self.watch_file = watch_file or Config.WATCH_FILE
+        self.interval = interval or Config.WATCH_INTERVAL
+        self.status = status or WatchStatus()
+        self._watch_mtime = None
+
+    def _jitter(self, seconds):
+        """给等待时间加上 ±WATCH_JITTER 比例的随机抖动"""
+        return seconds * (1 + random.uniform(-Config.WATCH_JITTER, Config.WATCH_JITTER))
+
+    def reload(self, novel_ids=None):
+        """读取关注列表并同步到状态中，novel_ids 为命令行直接指定的小说"""
+        if novel_ids:
+            watched = {novel_id: None for novel_id in novel_ids}
+        else:
+            mtime = self.watch_file.stat().st_mtime
+            if mtime == self._watch_mtime:
+                return
+            watched = parse_watch_file(self.watch_file)
+            self._watch_mtime = mtime
+
+        now = time.time()
+        for novel_id, interval in watched.items():
+            base = interval or self.interval
+            state = self.status.novels.get(novel_id)
+            if state is None:
+                # 新关注的小说在首轮内错开启动
+                self.status.novels[novel_id] = {
+                    'title': None,
+                    'base_interval': base,
+                    'interval': base,
+                    'next_poll': now + random.uniform(0, min(base, 60)),
+                    'last_poll': None,
+                    'last_update': None,
+                    'last_result': None,
+                    'last_error': None,
+                    'new_chapters': 0
+                }
+                self.logger.info(f"开始关注小说: {novel_id}")
+            elif state['base_interval'] != base:
+                state['base_interval'] = base
+                state['interval'] = min(state['interval'], base)
+                state['next_poll'] = min(state['next_poll'], now + self._jitter(base))
+
+        for novel_id in list(self.status.novels):
+            if novel_id not in watched:
+                del self.status.novels[novel_id]
+                self.logger.info(f"取消关注小说: {novel_id}")
+
+        self.status.save()
+        print(f"👀 正在关注 {len(watched)} 部小说")
+
+    def poll(self, novel_id):
+        """轮询一部小说并更新它的状态和下次轮询时间"""
+        state = self.status.novels[novel_id]
+        now = time.time()
+        state['last_poll'] = now
+        try:
+            result = self.syncer.sync(novel_id)
+        except Exception as e:
+            self.logger.exception(f"轮询小说 {novel_id} 失败: {str(e)}")
+            print(f"❌ 轮询小说 {novel_id} 失败: {str(e)}")
+            state['last_result'] = 'failed'
+            state['last_error'] = str(e)
+            # 失败同样放宽间隔，避免对出错的小说频繁请求
+            updated = False
+        else:
+            updated = result['status'] in ('initial', 'updated')
+            state['last_result'] = result['status']
+            state['last_error'] = None
+            if updated:
+                state['last_update'] = now
+                state['new_chapters'] = result['new']
+
+        snapshot = self.downloader.snapshots.load(novel_id)
+        if snapshot:
+            state['title'] = snapshot['title']
+
+        if updated:
+            state['interval'] = state['base_interval']
+        else:
+            state['interval'] = min(state['interval'] * Config.WATCH_BACKOFF,
+                                    max(Config.WATCH_MAX_INTERVAL, state['base_interval']))
+        state['next_poll'] = time.time() + self._jitter(state['interval'])
+        self.status.save()
+        self.logger.info(
+            f"小说 {novel_id} 轮询结果: {state['last_result']}，{state['interval'] / 60:.0f} 分钟后再次轮询"
+        )
+
+    def run(self, novel_ids=None):
+        """持续轮询，直到 Ctrl+C；novel_ids 为空时从关注列表文件读取"""
+        self.reload(novel_ids)
+        print("💡 按 Ctrl+C 停止轮询")
+
+        while True:
+            if not novel_ids:
+                try:
+                    self.reload()
+                except (OSError, ValueError) as e:
+                    self.logger.warning(f"重新读取关注列表失败，沿用原列表: {str(e)}")
+
+            if not self.status.novels:
+                time.sleep(Config.WATCH_RELOAD_INTERVAL)
+                continue
+
+            novel_id, state = min(self.status.novels.items(), key=lambda item: item[1]['next_poll'])
+            wait = state['next_poll'] - time.time()
+            if wait > 0:
+                # 最多等待 WATCH_RELOAD_INTERVAL，期间关注列表可能被修改
+                time.sleep(min(wait, Config.WATCH_RELOAD_INTERVAL))
+                continue
+
+            self.poll(novel_id)